@@ -1,14 +1,36 @@
 import json
 from langchain_core.prompts import ChatPromptTemplate
-from app.agents.LLMManager import LLMManager
+from app.agents.LLMManager import get_llm_manager
 from app.agents.graph_instructions import graph_instructions
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Промпты не зависят от запроса - собираем их один раз при импорте
+_LINE_LABEL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a data labeling expert. Given a question and some data, provide a concise and relevant label for the data series."),
+    ("human", "Question: {question}\n Data (first few rows): {data}\n\nProvide a concise label for this y axis. For example, if the data is the sales figures over time, the label could be 'Sales'. If the data is the population growth, the label could be 'Population'. If the data is the revenue trend, the label could be 'Revenue'."),
+])
+
+_LINE_Y_AXIS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a data labeling expert. Given a question and some data, provide a concise and relevant label for the y-axis."),
+    ("human", "Question: {question}\n Data (first few rows): {data}\n\nProvide a concise label for the y-axis. For example, if the data represents sales figures over time for different categories, the label could be 'Sales'. If it's about population growth for different groups, it could be 'Population'."),
+])
+
+_BAR_LABEL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a data labeling expert. Given a question and some data, provide a concise and relevant label for the data series."),
+    ("human", "Question: {question}\nData (first few rows): {data}\n\nProvide a concise label for this y axis. For example, if the data is the sales figures for products, the label could be 'Sales'. If the data is the population of cities, the label could be 'Population'. If the data is the revenue by region, the label could be 'Revenue'."),
+])
+
+_VISUALIZATION_FORMAT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a Data expert who formats data according to the required needs. You are given the question asked by the user, it's sql query, the result of the query and the format you need to format it in."),
+    ("human", 'For the given question: {question}\n\nSQL query: {sql_query}\n\Result: {results}\n\nUse the following example to structure the data: {instructions}. Just give the json string. Do not format it'),
+])
+
+
 class DataFormatter:
     def __init__(self):
-        self.llm_manager = LLMManager()
+        self.llm_manager = get_llm_manager()
 
     
     def format_data_for_visualization(self, state: dict) -> dict:
@@ -68,11 +90,7 @@ class DataFormatter:
             y_values = [float(row[1]) for row in results]
 
             # Use LLM to get a relevant label
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are a data labeling expert. Given a question and some data, provide a concise and relevant label for the data series."),
-                ("human", "Question: {question}\n Data (first few rows): {data}\n\nProvide a concise label for this y axis. For example, if the data is the sales figures over time, the label could be 'Sales'. If the data is the population growth, the label could be 'Population'. If the data is the revenue trend, the label could be 'Revenue'."),
-            ])
-            label = self.llm_manager.invoke(prompt, question=question, data=str(results[:2]))
+            label = self.llm_manager.invoke(_LINE_LABEL_PROMPT, question=question, data=str(results[:2]))
 
             formatted_data = {
                 "xValues": x_values,
@@ -134,11 +152,7 @@ class DataFormatter:
             }
 
             # Use LLM to get a relevant label for the y-axis
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are a data labeling expert. Given a question and some data, provide a concise and relevant label for the y-axis."),
-                ("human", "Question: {question}\n Data (first few rows): {data}\n\nProvide a concise label for the y-axis. For example, if the data represents sales figures over time for different categories, the label could be 'Sales'. If it's about population growth for different groups, it could be 'Population'."),
-            ])
-            y_axis_label = self.llm_manager.invoke(prompt, question=question, data=str(results[:2]))
+            y_axis_label = self.llm_manager.invoke(_LINE_Y_AXIS_PROMPT, question=question, data=str(results[:2]))
 
             # Add the y-axis label to the formatted data
             formatted_data["yAxisLabel"] = y_axis_label.strip()
@@ -192,11 +206,7 @@ class DataFormatter:
             data = [float(row[1]) for row in results]
             
             # Use LLM to get a relevant label
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are a data labeling expert. Given a question and some data, provide a concise and relevant label for the data series."),
-                ("human", "Question: {question}\nData (first few rows): {data}\n\nProvide a concise label for this y axis. For example, if the data is the sales figures for products, the label could be 'Sales'. If the data is the population of cities, the label could be 'Population'. If the data is the revenue by region, the label could be 'Revenue'."),
-            ])
-            label = self.llm_manager.invoke(prompt, question=question, data=str(results[:2]))
+            label = self.llm_manager.invoke(_BAR_LABEL_PROMPT, question=question, data=str(results[:2]))
             
             values = [{"data": data, "label": label}]
         elif len(results[0]) == 3:
@@ -220,11 +230,7 @@ class DataFormatter:
 
     def _format_other_visualizations(self, visualization, question, sql_query, results):
         instructions = graph_instructions[visualization]
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a Data expert who formats data according to the required needs. You are given the question asked by the user, it's sql query, the result of the query and the format you need to format it in."),
-            ("human", 'For the given question: {question}\n\nSQL query: {sql_query}\n\Result: {results}\n\nUse the following example to structure the data: {instructions}. Just give the json string. Do not format it'),
-        ])
-        response = self.llm_manager.invoke(prompt, question=question, sql_query=sql_query, results=results, instructions=instructions)
+        response = self.llm_manager.invoke(_VISUALIZATION_FORMAT_PROMPT, question=question, sql_query=sql_query, results=results, instructions=instructions)
             
         try:
             formatted_data_for_visualization = json.loads(response)
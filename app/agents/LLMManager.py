@@ -1,11 +1,43 @@
 import os
+import time
+import random
+import asyncio
+import hashlib
+import json
+import threading
+import atexit
+import httpx
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
-from openai import APIConnectionError, APIError
+from openai import APIConnectionError, APIError, APIStatusError, RateLimitError, InternalServerError
+from app.agents.ttl_cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Общие HTTP-клиенты с keep-alive пулом соединений к Alem.ai
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+_HTTP_CLIENT = httpx.Client(limits=_HTTP_LIMITS, timeout=30.0)
+_ASYNC_HTTP_CLIENT = httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=30.0)
+atexit.register(_HTTP_CLIENT.close)
+
+
+def _as_text(content) -> str:
+    """Приводит content сообщения к строке (для мультимодальных сообщений это список частей)"""
+    return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+
+
+def _retry_after_seconds(error: Exception):
+    """Значение заголовка Retry-After (в секундах), если сервер его прислал"""
+    if not isinstance(error, APIStatusError):
+        return None
+    value = error.response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
 class LLMManager:
     def __init__(self):
         # Используем Alem.ai API с моделью Qwen3
@@ -23,52 +55,127 @@ class LLMManager:
             "temperature": 0,
             "api_key": self.api_key,
             "base_url": base_url,
-            "timeout": 30.0,  # Таймаут в секундах
-            "max_retries": 2,  # Количество повторных попыток
+            "timeout": float(os.getenv("LLM_REQUEST_TIMEOUT", "30")),  # Таймаут одной попытки
+            "max_retries": 0,  # Повторы делаем сами, в пределах общего дедлайна
+            "http_client": _HTTP_CLIENT,
+            "http_async_client": _ASYNC_HTTP_CLIENT,
         }
             
         self.llm = ChatOpenAI(**llm_kwargs)
+        
+        # Локальный кэш ответов: ключ - хэш всех сообщений промпта
+        self._response_cache = TTLCache(
+            maxsize=int(os.getenv("LLM_CACHE_MAXSIZE", "1024")),
+            ttl=float(os.getenv("LLM_CACHE_TTL", "3600"))
+        )
+        
+        # Лимит одновременных асинхронных запросов к LLM
+        self._semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "10")))
+        
+        # Политика повторов: общий дедлайн на вызов + экспоненциальная задержка с jitter
+        self._deadline = float(os.getenv("LLM_REQUEST_DEADLINE", "45"))
+        self._backoff_initial = 0.5
+        self._backoff_max = 4.0
         logger.info(f"✅ LLMManager инициализирован с моделью qwen3 (Alem.ai)")
 
-    def invoke(self, prompt: ChatPromptTemplate, **kwargs) -> str:
-        try:
-            # Форматируем промпт в сообщения
-            messages = prompt.format_messages(**kwargs)
-            
-            logger.info(f"  → Вызов LLM (модель: {self.llm.model_name})")
-            
-            # Логируем запрос
-            logger.info("  📤 Запрос к LLM:")
-            for i, msg in enumerate(messages):
-                role = msg.__class__.__name__.replace("Message", "")
-                content = msg.content
-                # Обрезаем слишком длинные сообщения
-                if len(content) > 500:
-                    content_preview = content[:250] + "\n...\n" + content[-250:]
-                else:
-                    content_preview = content
-                logger.info(f"    [{i+1}] {role}:")
-                for line in content_preview.split('\n'):
-                    logger.info(f"      {line}")
-            
-            # Вызываем OpenAI через LangChain
-            response = self.llm.invoke(messages)
-            
-            # Логируем ответ
-            logger.info("  📥 Ответ от LLM:")
-            response_content = response.content
-            if len(response_content) > 1000:
-                response_preview = response_content[:500] + "\n...\n" + response_content[-500:]
+    @staticmethod
+    def _cache_key(messages) -> bytes:
+        """Хэш от ролей и содержимого всех сообщений"""
+        h = hashlib.blake2b(digest_size=16)
+        for msg in messages:
+            h.update(msg.type.encode())
+            h.update(b"\0")
+            h.update(_as_text(msg.content).encode())
+            h.update(b"\0")
+        return h.digest()
+    
+    def _log_request(self, messages):
+        """Логирует сообщения, отправляемые в LLM (только на уровне DEBUG)"""
+        logger.info("  → Вызов LLM (модель: %s)", self.llm.model_name)
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        
+        # Логируем запрос
+        logger.debug("  📤 Запрос к LLM:")
+        for i, msg in enumerate(messages):
+            role = msg.__class__.__name__.replace("Message", "")
+            content = _as_text(msg.content)
+            # Обрезаем слишком длинные сообщения
+            if len(content) > 500:
+                content_preview = f"{content[:250]}\n...\n{content[-250:]}"
             else:
-                response_preview = response_content
-            for line in response_preview.split('\n'):
-                logger.info(f"    {line}")
-            
-            # Возвращаем содержимое ответа
-            return response.content
-                
-        except APIConnectionError as e:
-            raise RuntimeError(
+                content_preview = content
+            logger.debug("    [%d] %s:\n%s", i + 1, role, content_preview)
+    
+    def _log_response(self, response_content: str):
+        """Логирует ответ LLM (только на уровне DEBUG)"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if len(response_content) > 1000:
+            response_preview = f"{response_content[:500]}\n...\n{response_content[-500:]}"
+        else:
+            response_preview = response_content
+        logger.debug("  📥 Ответ от LLM:\n%s", response_preview)
+    
+    @staticmethod
+    def _is_retryable(e: Exception) -> bool:
+        """Повторяем только сетевые ошибки, таймауты, 429 и 5xx"""
+        return isinstance(e, (APIConnectionError, RateLimitError, InternalServerError))
+    
+    def _retry_delay(self, attempt: int, e: Exception, deadline: float):
+        """
+        Задержка перед следующей попыткой или None, если ошибку не повторяем
+        либо повтор не укладывается в дедлайн
+        """
+        if not self._is_retryable(e):
+            return None
+        delay = random.uniform(0, min(self._backoff_max, self._backoff_initial * (2 ** attempt)))
+        retry_after = _retry_after_seconds(e)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if time.monotonic() + delay >= deadline:
+            return None
+        logger.warning("  ⚠ Ошибка LLM (%s), повтор через %.2f с", type(e).__name__, delay)
+        return delay
+    
+    def _call_llm(self, messages):
+        """Синхронный вызов LLM с повторами; каждая попытка ограничена остатком дедлайна"""
+        deadline = time.monotonic() + self._deadline
+        attempt = 0
+        while True:
+            try:
+                # timeout уходит в запрос OpenAI-клиента (поверх общего таймаута клиента)
+                return self.llm.invoke(messages, timeout=max(deadline - time.monotonic(), 0.001))
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+    
+    async def _acall_llm(self, messages):
+        """Асинхронный вызов LLM с повторами; каждая попытка ограничена остатком дедлайна"""
+        deadline = time.monotonic() + self._deadline
+        attempt = 0
+        while True:
+            try:
+                # Семафор держим только на время попытки, не во время ожидания между ними
+                async with self._semaphore:
+                    return await asyncio.wait_for(
+                        self.llm.ainvoke(messages),
+                        timeout=max(deadline - time.monotonic(), 0.001)
+                    )
+            except Exception as e:
+                delay = self._retry_delay(attempt, e, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+    
+    def _wrap_error(self, e: Exception) -> RuntimeError:
+        """Преобразует ошибку клиента в RuntimeError с понятным сообщением"""
+        if isinstance(e, APIConnectionError):
+            return RuntimeError(
                 f"Failed to connect to Alem.ai API. Please check:\n"
                 f"1. Your internet connection\n"
                 f"2. DNS settings\n"
@@ -76,7 +183,121 @@ class LLMManager:
                 f"4. API endpoint: {self.llm.openai_api_base}\n"
                 f"Original error: {str(e)}"
             )
-        except APIError as e:
-            raise RuntimeError(f"Alem.ai API error: {str(e)}")
+        if isinstance(e, APIError):
+            return RuntimeError(f"Alem.ai API error: {str(e)}")
+        return RuntimeError(f"Error generating answer with Alem.ai (Qwen3): {str(e)}")
+
+    def _format(self, prompt: ChatPromptTemplate, **kwargs) -> list:
+        """Форматирует шаблон в список сообщений"""
+        try:
+            return prompt.format_messages(**kwargs)
         except Exception as e:
-            raise RuntimeError(f"Error generating answer with Alem.ai (Qwen3): {str(e)}")
\ No newline at end of file
+            raise self._wrap_error(e)
+
+    def invoke(self, prompt: ChatPromptTemplate, use_cache: bool = True, **kwargs) -> str:
+        # Форматируем промпт в сообщения
+        return self.invoke_messages(self._format(prompt, **kwargs), use_cache=use_cache)
+
+    async def ainvoke(self, prompt: ChatPromptTemplate, use_cache: bool = True, **kwargs) -> str:
+        """Асинхронная версия invoke: не блокирует event loop на время запроса к LLM"""
+        return await self.ainvoke_messages(self._format(prompt, **kwargs), use_cache=use_cache)
+
+    async def astream(self, prompt: ChatPromptTemplate, use_cache: bool = True, **kwargs):
+        """Потоковая генерация: отдает куски ответа по мере их получения от LLM"""
+        async for chunk in self.astream_messages(self._format(prompt, **kwargs), use_cache=use_cache):
+            yield chunk
+
+    def invoke_messages(self, messages: list, use_cache: bool = True) -> str:
+        """Вызов LLM с готовым списком сообщений (без слоя ChatPromptTemplate)"""
+        try:
+            cache_key = self._cache_key(messages) if use_cache else None
+            if cache_key is not None:
+                cached = self._response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("  ✓ Ответ LLM взят из кэша")
+                    return cached
+            
+            self._log_request(messages)
+            
+            # Вызываем OpenAI через LangChain
+            response = self._call_llm(messages)
+            
+            response_content = _as_text(response.content)
+            self._log_response(response_content)
+            
+            if cache_key is not None:
+                self._response_cache.set(cache_key, response_content)
+            
+            # Возвращаем содержимое ответа
+            return response_content
+                
+        except Exception as e:
+            raise self._wrap_error(e)
+
+    async def ainvoke_messages(self, messages: list, use_cache: bool = True) -> str:
+        """Асинхронная версия invoke_messages"""
+        try:
+            cache_key = self._cache_key(messages) if use_cache else None
+            if cache_key is not None:
+                cached = self._response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("  ✓ Ответ LLM взят из кэша")
+                    return cached
+            
+            self._log_request(messages)
+            
+            response = await self._acall_llm(messages)
+            
+            response_content = _as_text(response.content)
+            self._log_response(response_content)
+            
+            if cache_key is not None:
+                self._response_cache.set(cache_key, response_content)
+            
+            return response_content
+                
+        except Exception as e:
+            raise self._wrap_error(e)
+
+    async def astream_messages(self, messages: list, use_cache: bool = True):
+        """Потоковая версия invoke_messages"""
+        try:
+            cache_key = self._cache_key(messages) if use_cache else None
+            if cache_key is not None:
+                cached = self._response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("  ✓ Ответ LLM взят из кэша")
+                    yield cached
+                    return
+            
+            self._log_request(messages)
+            
+            parts = []
+            async with self._semaphore:
+                async for chunk in self.llm.astream(messages):
+                    if chunk.content:
+                        text = _as_text(chunk.content)
+                        parts.append(text)
+                        yield text
+            
+            response_content = "".join(parts)
+            self._log_response(response_content)
+            
+            if cache_key is not None:
+                self._response_cache.set(cache_key, response_content)
+                
+        except Exception as e:
+            raise self._wrap_error(e)
+
+_llm_manager = None
+_llm_manager_lock = threading.Lock()
+
+
+def get_llm_manager() -> LLMManager:
+    """Возвращает общий для всех агентов экземпляр LLMManager"""
+    global _llm_manager
+    if _llm_manager is None:
+        with _llm_manager_lock:
+            if _llm_manager is None:
+                _llm_manager = LLMManager()
+    return _llm_manager
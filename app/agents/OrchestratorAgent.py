@@ -4,38 +4,42 @@ Orchestrator Agent - главный агент-роутер
 """
 
 from langchain_core.prompts import ChatPromptTemplate
-from app.agents.LLMManager import LLMManager
+from langchain_core.messages import HumanMessage, SystemMessage
+from app.agents.LLMManager import get_llm_manager
+from app.agents._postprocess import parse_routing_json
+from app.agents.text_utils import normalize_question
+from app.agents.ttl_cache import TTLCache
 import logging
 import json
+import os
+import re
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+# Быстрый роутинг по ключевым словам: однозначные вопросы не требуют вызова LLM.
+# Названия платформ встречаются в вопросах всех агентов, поэтому в правилах
+# только слова, специфичные для темы.
+_RULES = {
+    "verification_agent": re.compile(
+        r"(верифи|verif|галочк|подтвер\w* профил|документ\w* для|for artists|доступ к статистик)",
+        re.IGNORECASE,
+    ),
+    "release_cover_agent": re.compile(
+        r"(обложк|cover|аватар|шапк|баннер|размер\w* фото|фото для релиз|изображени|пиксел|\d+\s*x\s*\d+)",
+        re.IGNORECASE,
+    ),
+    "lyrics_agent": re.compile(
+        r"(караоке|karaoke|lyrics|текст\w* пес|синхрониз\w* текст|\blrc\b|\bttml\b)",
+        re.IGNORECASE,
+    ),
+}
 
-class OrchestratorAgent:
-    """
-    Главный агент-оркестратор
-    Анализирует вопрос и определяет, какой агент должен его обработать
-    """
-    
-    def __init__(self):
-        self.llm_manager = LLMManager()
-        logger.info("✅ Инициализирован OrchestratorAgent")
-    
-    def route_question(self, state: dict) -> dict:
-        """
-        Определяет тип вопроса и выбирает подходящего агента
-        """
-        logger.info("→ Orchestrator анализирует вопрос")
-        question = state['question']
-        artist_name = state.get('artist_name')
-        
-        # Контекст артиста
-        artist_context = ""
-        if artist_name:
-            artist_context = f"\n\n🎤 КОНТЕКСТ: Вопрос от артиста {artist_name}"
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Ты главный роутер вопросов для музыкального лейбла õzen.
+_ARTIST_CONTEXT = "\n\n🎤 КОНТЕКСТ: Вопрос от артиста {}"
+
+# Шаблон роутера собирается один раз при импорте модуля
+_ROUTER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """Ты главный роутер вопросов для музыкального лейбла õzen.
 Твоя задача - определить тип вопроса и выбрать подходящего агента.{artist_context}
 
 ДОСТУПНЫЕ АГЕНТЫ:
@@ -103,35 +107,94 @@ class OrchestratorAgent:
 
 Верни ТОЛЬКО JSON, без дополнительного текста.
 """),
-            ("human", "{question}"),
-        ])
-        
-        response = self.llm_manager.invoke(
-            prompt,
-            question=question,
-            artist_context=artist_context
+    ("human", "{question}"),
+])
+
+
+class OrchestratorAgent:
+    """
+    Главный агент-оркестратор
+    Анализирует вопрос и определяет, какой агент должен его обработать
+    """
+    
+    def __init__(self):
+        self.llm_manager = get_llm_manager()
+        # Кэш решений роутера по нормализованному вопросу
+        self._route_cache = TTLCache(
+            maxsize=int(os.getenv("ROUTE_CACHE_MAXSIZE", "2048")),
+            ttl=float(os.getenv("ROUTE_CACHE_TTL", "3600"))
         )
+        # Статистика правил: сколько вопросов закрыто без LLM и сколько ушло в LLM
+        self._rule_stats = Counter()
+        # Готовые системные сообщения по артисту
+        self._system_cache = TTLCache(maxsize=256, ttl=float(os.getenv("ROUTE_CACHE_TTL", "3600")))
+        logger.info("✅ Инициализирован OrchestratorAgent")
+    
+    @staticmethod
+    def _route_cache_key(state: dict) -> tuple:
+        """Ключ кэша роутинга: артист + нормализованный вопрос"""
+        return (state.get('artist_name') or "", normalize_question(state['question']))
+    
+    def _remember_route(self, key: tuple, routing: dict) -> dict:
+        """Кэширует успешное решение роутера (фолбэк при ошибке не кэшируется)"""
+        if routing.get("routing_confidence") != "low":
+            self._route_cache.set(key, routing)
+        return routing
+    
+    def _system_message(self, artist_name: str) -> SystemMessage:
+        """Системное сообщение роутера; форматируется один раз на артиста"""
+        message = self._system_cache.get(artist_name)
+        if message is None:
+            # Контекст артиста
+            artist_context = _ARTIST_CONTEXT.format(artist_name) if artist_name else ""
+            message = _ROUTER_PROMPT.messages[0].format(artist_context=artist_context)
+            self._system_cache.set(artist_name, message)
+        return message
+    
+    def _messages(self, state: dict) -> list:
+        """Собирает сообщения роутера из состояния"""
+        system_message = self._system_message(state.get('artist_name') or "")
+        return [system_message, HumanMessage(content=state['question'])]
+    
+    def _rule_route(self, question: str):
+        """
+        Роутинг по ключевым словам. Возвращает решение, только если
+        сработало правило ровно одного агента, иначе None (решает LLM)
+        """
+        matched = [agent for agent, pattern in _RULES.items() if pattern.search(question)]
+        if len(matched) != 1:
+            self._rule_stats["ambiguous" if matched else "miss"] += 1
+            return None
         
-        # Парсим JSON ответ
+        self._rule_stats["hit"] += 1
+        logger.info("  ✓ Выбран агент по ключевым словам: %s", matched[0])
+        return {
+            "selected_agent": matched[0],
+            "routing_reasoning": "regex-match",
+            "routing_confidence": "high"
+        }
+    
+    def _track_rule_miss(self, question: str, routing: dict) -> dict:
+        """
+        Логирует вопросы, которые правила не распознали, а LLM уверенно
+        отнес к агенту - по ним пополняются ключевые слова в _RULES
+        """
+        if routing.get("routing_confidence") == "high":
+            self._rule_stats["llm_high"] += 1
+            logger.info(
+                "  ⚠ Правила не распознали вопрос (LLM: %s): %s | статистика: %s",
+                routing["selected_agent"], question, dict(self._rule_stats)
+            )
+        return routing
+    
+    def _parse_routing(self, response: str) -> dict:
+        """Разбирает JSON-ответ роутера"""
         try:
-            # Убираем markdown форматирование если есть
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.startswith("```"):
-                response = response[3:]
-            if response.endswith("```"):
-                response = response[:-3]
-            response = response.strip()
+            # Берем первый JSON-объект, игнорируя markdown и лишний текст
+            agent, reasoning, confidence = parse_routing_json(response)
             
-            routing = json.loads(response)
-            agent = routing.get("agent")
-            reasoning = routing.get("reasoning", "")
-            confidence = routing.get("confidence", "medium")
-            
-            logger.info(f"  ✓ Выбран агент: {agent}")
-            logger.info(f"    Обоснование: {reasoning}")
-            logger.info(f"    Уверенность: {confidence}")
+            logger.info("  ✓ Выбран агент: %s (уверенность: %s)", agent, confidence)
+            logger.debug("    Обоснование: %s", reasoning)
             
             return {
                 "selected_agent": agent,
@@ -140,11 +203,51 @@ class OrchestratorAgent:
             }
             
         except json.JSONDecodeError as e:
-            logger.error(f"  ✗ Ошибка парсинга JSON: {e}")
-            logger.error(f"    Ответ LLM: {response}")
+            logger.error("  ✗ Ошибка парсинга JSON: %s", e)
+            logger.error("    Ответ LLM: %s", response)
             # По умолчанию отправляем на general_agent
             return {
                 "selected_agent": "general_agent",
                 "routing_reasoning": "Ошибка роутинга, используем general agent",
                 "routing_confidence": "low"
             }
+    
+    def route_question(self, state: dict) -> dict:
+        """
+        Определяет тип вопроса и выбирает подходящего агента
+        """
+        logger.info("→ Orchestrator анализирует вопрос")
+        routing = self._rule_route(state['question'])
+        if routing is not None:
+            return routing
+        
+        key = self._route_cache_key(state)
+        cached = self._route_cache.get(key)
+        if cached is not None:
+            logger.info("  ✓ Роутинг взят из кэша: %s", cached["selected_agent"])
+            return dict(cached)
+        
+        response = self.llm_manager.invoke_messages(self._messages(state))
+        return self._remember_route(
+            key, self._track_rule_miss(state['question'], self._parse_routing(response))
+        )
+    
+    async def aroute_question(self, state: dict) -> dict:
+        """
+        Асинхронная версия route_question
+        """
+        logger.info("→ Orchestrator анализирует вопрос")
+        routing = self._rule_route(state['question'])
+        if routing is not None:
+            return routing
+        
+        key = self._route_cache_key(state)
+        cached = self._route_cache.get(key)
+        if cached is not None:
+            logger.info("  ✓ Роутинг взят из кэша: %s", cached["selected_agent"])
+            return dict(cached)
+        
+        response = await self.llm_manager.ainvoke_messages(self._messages(state))
+        return self._remember_route(
+            key, self._track_rule_miss(state['question'], self._parse_routing(response))
+        )
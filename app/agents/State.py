@@ -2,6 +2,8 @@ from typing import List, Any, Annotated, Dict, Optional
 from typing_extensions import TypedDict
 import operator
 
+__all__ = ['State', 'InputState', 'OutputState']
+
 class State(TypedDict, total=False):
     # Input fields
     question: str
@@ -40,6 +42,17 @@ class State(TypedDict, total=False):
     visualization_reason: str
     formatted_data_for_visualization: Dict[str, Any]
 
-# Aliases for backward compatibility
-InputState = State
-OutputState = State
\ No newline at end of file
+
+class InputState(TypedDict, total=False):
+    """Поля, с которыми запускается workflow"""
+    question: str
+    uuid: str
+    artist_name: Optional[str]
+
+
+class OutputState(TypedDict, total=False):
+    """Поля, которые workflow возвращает наружу"""
+    answer: str
+    agent_used: str
+    selected_agent: str
+    routing_confidence: str
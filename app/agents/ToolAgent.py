@@ -4,12 +4,14 @@ Selects and executes appropriate analytics tools based on user questions
 """
 
 from langchain_core.prompts import ChatPromptTemplate
-from app.agents.LLMManager import LLMManager
+from app.agents.LLMManager import get_llm_manager
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+__all__ = ['ToolAgent']
+
 
 class ToolAgent:
     """
@@ -18,7 +20,7 @@ class ToolAgent:
     """
     
     def __init__(self):
-        self.llm_manager = LLMManager()
+        self.llm_manager = get_llm_manager()
         logger.info(f"✅ Инициализирован ToolAgent")
     
     def select_tool(self, state: dict) -> dict:
@@ -1,12 +1,18 @@
 from langgraph.graph import StateGraph
-from app.agents.State import State
+from langchain_core.runnables import RunnableLambda
+from app.agents.State import State, InputState, OutputState
 from app.agents.OrchestratorAgent import OrchestratorAgent
 from app.agents.faq import VerificationAgent, ReleaseCoverAgent, LyricsAgent
+from app.agents.text_utils import normalize_question
+from app.agents.ttl_cache import TTLCache
 from langgraph.graph import END
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+__all__ = ['WorkflowManager']
+
 
 class WorkflowManager:
     """
@@ -19,23 +25,44 @@ class WorkflowManager:
         self.verification_agent = VerificationAgent()
         self.release_cover_agent = ReleaseCoverAgent()
         self.lyrics_agent = LyricsAgent()
+        self._faq_agents = {
+            "verification_agent": self.verification_agent,
+            "release_cover_agent": self.release_cover_agent,
+            "lyrics_agent": self.lyrics_agent,
+        }
+        # Граф компилируется один раз и переиспользуется во всех запросах
+        self._app = self.create_workflow().compile()
+        # Кэш готовых ответов по нормализованному вопросу
+        self._answer_cache = TTLCache(
+            maxsize=int(os.getenv("ANSWER_CACHE_MAXSIZE", "1024")),
+            ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+        )
         logger.info("✅ WorkflowManager инициализирован с 3 FAQ агентами")
 
     def create_workflow(self) -> StateGraph:
         """Создание графа workflow с оркестратором и FAQ агентами"""
-        workflow = StateGraph(State)
+        # Вход и выход графа ограничены небольшими схемами, чтобы не копировать весь State
+        workflow = StateGraph(State, input_schema=InputState, output_schema=OutputState)
 
-        # Добавляем узлы
-        workflow.add_node("orchestrator", self.orchestrator.route_question)
-        workflow.add_node("verification_agent", self.verification_agent.answer)
-        workflow.add_node("release_cover_agent", self.release_cover_agent.answer)
-        workflow.add_node("lyrics_agent", self.lyrics_agent.answer)
+        # Добавляем узлы (sync + async реализации, чтобы работали invoke и ainvoke)
+        workflow.add_node("orchestrator", RunnableLambda(
+            self.orchestrator.route_question, afunc=self.orchestrator.aroute_question
+        ))
+        workflow.add_node("verification_agent", RunnableLambda(
+            self.verification_agent.answer, afunc=self.verification_agent.aanswer
+        ))
+        workflow.add_node("release_cover_agent", RunnableLambda(
+            self.release_cover_agent.answer, afunc=self.release_cover_agent.aanswer
+        ))
+        workflow.add_node("lyrics_agent", RunnableLambda(
+            self.lyrics_agent.answer, afunc=self.lyrics_agent.aanswer
+        ))
         
         # Функция роутинга после оркестратора
         def route_to_agent(state: dict) -> str:
             """Роутинг к нужному агенту"""
             selected_agent = state.get('selected_agent', 'verification_agent')
-            logger.info(f"  → Роутинг к: {selected_agent}")
+            logger.info("  → Роутинг к: %s", selected_agent)
             return selected_agent
         
         # Точка входа - оркестратор
@@ -61,26 +88,37 @@ class WorkflowManager:
     
     def returnGraph(self):
         """Возвращает скомпилированный граф"""
-        return self.create_workflow().compile()
+        return self._app
 
-    def run_agent_workflow(self, question: str, uuid: str, artist_name: str = None) -> dict:
-        """Запуск multi-agent workflow"""
+    def _log_start(self, question: str, uuid: str, artist_name: str = None):
+        """Логирует начало выполнения workflow"""
         logger.info("=" * 80)
         logger.info(">>> Запуск Multi-Agent Workflow")
         logger.info("=" * 80)
         
-        app = self.create_workflow().compile()
-        
         logger.info(f">>> Вопрос: {question}")
         logger.info(f">>> Артист: {artist_name or 'Общий вопрос'}")
         logger.info(f">>> UUID: {uuid}")
-        
-        result = app.invoke({
-            "question": question, 
-            "uuid": uuid,
-            "artist_name": artist_name
-        })
-        
+    
+    @staticmethod
+    def _answer_cache_key(question: str, artist_name: str = None) -> tuple:
+        """Ключ кэша ответов: артист + нормализованный вопрос"""
+        return (artist_name or "", normalize_question(question))
+    
+    def _cached_response(self, key: tuple):
+        """Возвращает закэшированный ответ, если он есть"""
+        cached = self._answer_cache.get(key)
+        if cached is None:
+            return None
+        logger.info(">>> Ответ взят из кэша")
+        return {
+            "answer": cached["answer"],
+            "agent_used": cached["agent_used"],
+            "routing_confidence": "cached"
+        }
+    
+    def _build_response(self, result: dict, key: tuple) -> dict:
+        """Логирует итог workflow, формирует и кэширует ответ"""
         logger.info("=" * 80)
         logger.info(">>> Workflow завершен")
         logger.info(f"    - Выбранный агент: {result.get('selected_agent', 'N/A')}")
@@ -88,11 +126,82 @@ class WorkflowManager:
         logger.info(f"    - Уверенность: {result.get('routing_confidence', 'N/A')}")
         logger.info("=" * 80)
         
-        return {
+        response = {
             "answer": result.get('answer', 'Ответ не сгенерирован'),
             "agent_used": result.get('agent_used'),
             "routing_confidence": result.get('routing_confidence')
         }
+        if result.get('answer'):
+            self._answer_cache.set(key, response)
+        return response
+
+    def run_agent_workflow(self, question: str, uuid: str, artist_name: str = None) -> dict:
+        """Запуск multi-agent workflow"""
+        self._log_start(question, uuid, artist_name)
+        
+        key = self._answer_cache_key(question, artist_name)
+        cached = self._cached_response(key)
+        if cached is not None:
+            return cached
+        
+        result = self._app.invoke({
+            "question": question, 
+            "uuid": uuid,
+            "artist_name": artist_name
+        })
+        
+        return self._build_response(result, key)
+    
+    async def run_agent_workflow_async(self, question: str, uuid: str, artist_name: str = None) -> dict:
+        """Асинхронный запуск multi-agent workflow (не блокирует event loop)"""
+        self._log_start(question, uuid, artist_name)
+        
+        key = self._answer_cache_key(question, artist_name)
+        cached = self._cached_response(key)
+        if cached is not None:
+            return cached
+        
+        result = await self._app.ainvoke({
+            "question": question, 
+            "uuid": uuid,
+            "artist_name": artist_name
+        })
+        
+        return self._build_response(result, key)
+    
+    async def stream_agent_workflow(self, question: str, uuid: str, artist_name: str = None):
+        """
+        Потоковый запуск: роутинг оркестратором, затем ответ FAQ агента по частям.
+        Первые токены уходят клиенту, не дожидаясь полной генерации ответа.
+        """
+        self._log_start(question, uuid, artist_name)
+        
+        key = self._answer_cache_key(question, artist_name)
+        cached = self._cached_response(key)
+        if cached is not None:
+            yield cached["answer"]
+            return
+        
+        state = {"question": question, "uuid": uuid, "artist_name": artist_name}
+        routing = await self.orchestrator.aroute_question(state)
+        agent_key = routing.get("selected_agent")
+        if agent_key not in self._faq_agents:
+            agent_key = "verification_agent"
+        logger.info("  → Роутинг к: %s", agent_key)
+        
+        parts = []
+        async for chunk in self._faq_agents[agent_key].astream_answer(state):
+            parts.append(chunk)
+            yield chunk
+        
+        answer = "".join(parts)
+        logger.info(">>> Workflow завершен (stream, %d символов)", len(answer))
+        if answer:
+            self._answer_cache.set(key, {
+                "answer": answer,
+                "agent_used": agent_key.removesuffix("_agent"),
+                "routing_confidence": routing.get("routing_confidence")
+            })
     
     # Backward compatibility
     def run_tool_agent(self, question: str, uuid: str, artist_name: str = None) -> dict:
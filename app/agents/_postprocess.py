@@ -0,0 +1,25 @@
+"""
+Пост-обработка ответов LLM на горячем пути запроса.
+Модуль полностью типизирован и не зависит от агентов, поэтому его
+можно вынести в отдельное расширение (например, через mypyc).
+"""
+
+from typing import Optional, Tuple
+
+from app.agents.json_utils import extract_json_object
+
+
+def parse_routing_json(response: str) -> Tuple[Optional[str], str, str]:
+    """
+    Разбирает ответ роутера в (agent, reasoning, confidence).
+    Бросает json.JSONDecodeError, если JSON-объект не найден.
+    """
+    routing = extract_json_object(response)
+    agent = routing.get("agent")
+    reasoning = routing.get("reasoning", "")
+    confidence = routing.get("confidence", "medium")
+    return (
+        str(agent) if agent is not None else None,
+        str(reasoning),
+        str(confidence),
+    )
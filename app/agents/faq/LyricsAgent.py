@@ -4,46 +4,16 @@ Lyrics FAQ Agent
 """
 
 from langchain_core.prompts import ChatPromptTemplate
-from app.agents.LLMManager import LLMManager
+from langchain_core.messages import HumanMessage
+from app.agents.LLMManager import get_llm_manager
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
-
-class LyricsAgent:
-    """
-    Агент для ответов на вопросы о создании караоке/текстов песен
-    """
-    
-    def __init__(self):
-        self.llm_manager = LLMManager()
-        self.knowledge_base = self._load_knowledge_base()
-        logger.info("✅ Инициализирован LyricsAgent")
-    
-    def _load_knowledge_base(self) -> str:
-        """Загружает базу знаний из lyrics_guide.txt"""
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        faq_path = os.path.join(base_dir, 'services', 'faq', 'lyrics_guide.txt')
-        
-        try:
-            with open(faq_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            logger.info(f"  ✓ Загружена база знаний: {len(content)} символов")
-            return content
-        except Exception as e:
-            logger.error(f"  ✗ Ошибка загрузки базы знаний: {e}")
-            return ""
-    
-    def answer(self, state: dict) -> dict:
-        """
-        Отвечает на вопрос о караоке на основе базы знаний
-        """
-        logger.info("→ LyricsAgent обрабатывает вопрос")
-        question = state['question']
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Ты эксперт по созданию караоке и текстов песен для музыкальных платформ лейбла õzen.
+# Шаблон собирается один раз при импорте модуля
+_LYRICS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """Ты эксперт по созданию караоке и текстов песен для музыкальных платформ лейбла õzen.
 
 БАЗА ЗНАНИЙ:
 {knowledge_base}
@@ -92,18 +62,72 @@ class LyricsAgent:
 
 💡 Используйте lyricpotato.com для автоматического создания временных меток."
 """),
-            ("human", "{question}"),
-        ])
-        
-        response = self.llm_manager.invoke(
-            prompt,
-            question=question,
-            knowledge_base=self.knowledge_base
-        )
+    ("human", "{question}"),
+])
+
+
+class LyricsAgent:
+    """
+    Агент для ответов на вопросы о создании караоке/текстов песен
+    """
+    
+    def __init__(self):
+        self.llm_manager = get_llm_manager()
+        self.knowledge_base = self._load_knowledge_base()
+        # База знаний статична - системное сообщение собираем один раз
+        self._system_message = _LYRICS_PROMPT.messages[0].format(knowledge_base=self.knowledge_base)
+        logger.info("✅ Инициализирован LyricsAgent")
+    
+    def _load_knowledge_base(self) -> str:
+        """Загружает базу знаний из lyrics_guide.txt"""
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        faq_path = os.path.join(base_dir, 'services', 'faq', 'lyrics_guide.txt')
         
-        logger.info(f"  ✓ Ответ сгенерирован ({len(response)} символов)")
+        try:
+            with open(faq_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            logger.info(f"  ✓ Загружена база знаний: {len(content)} символов")
+            return content
+        except Exception as e:
+            logger.error(f"  ✗ Ошибка загрузки базы знаний: {e}")
+            return ""
+    
+    def _messages(self, state: dict) -> list:
+        """Готовое системное сообщение + вопрос пользователя"""
+        return [self._system_message, HumanMessage(content=state['question'])]
+    
+    def _build_result(self, response: str) -> dict:
+        """Формирует обновление состояния из ответа LLM"""
+        logger.info("  ✓ Ответ сгенерирован (%d символов)", len(response))
         
         return {
             "answer": response,
             "agent_used": "lyrics"
         }
+    
+    def answer(self, state: dict) -> dict:
+        """
+        Отвечает на вопрос о караоке на основе базы знаний
+        """
+        logger.info("→ LyricsAgent обрабатывает вопрос")
+        
+        response = self.llm_manager.invoke_messages(self._messages(state))
+        return self._build_result(response)
+    
+    async def aanswer(self, state: dict) -> dict:
+        """
+        Асинхронная версия answer
+        """
+        logger.info("→ LyricsAgent обрабатывает вопрос")
+        
+        response = await self.llm_manager.ainvoke_messages(self._messages(state))
+        return self._build_result(response)
+    
+    async def astream_answer(self, state: dict):
+        """
+        Потоковая версия answer: отдает ответ по частям
+        """
+        logger.info("→ LyricsAgent обрабатывает вопрос")
+        
+        async for chunk in self.llm_manager.astream_messages(self._messages(state)):
+            yield chunk
@@ -4,46 +4,16 @@ Release Cover FAQ Agent
 """
 
 from langchain_core.prompts import ChatPromptTemplate
-from app.agents.LLMManager import LLMManager
+from langchain_core.messages import HumanMessage
+from app.agents.LLMManager import get_llm_manager
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
-
-class ReleaseCoverAgent:
-    """
-    Агент для ответов на вопросы о параметрах фото для релизов
-    """
-    
-    def __init__(self):
-        self.llm_manager = LLMManager()
-        self.knowledge_base = self._load_knowledge_base()
-        logger.info("✅ Инициализирован ReleaseCoverAgent")
-    
-    def _load_knowledge_base(self) -> str:
-        """Загружает базу знаний из release_cover.txt"""
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        faq_path = os.path.join(base_dir, 'services', 'faq', 'release_cover.txt')
-        
-        try:
-            with open(faq_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            logger.info(f"  ✓ Загружена база знаний: {len(content)} символов")
-            return content
-        except Exception as e:
-            logger.error(f"  ✗ Ошибка загрузки базы знаний: {e}")
-            return ""
-    
-    def answer(self, state: dict) -> dict:
-        """
-        Отвечает на вопрос о параметрах фото на основе базы знаний
-        """
-        logger.info("→ ReleaseCoverAgent обрабатывает вопрос")
-        question = state['question']
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Ты эксперт по требованиям к обложкам и фото для музыкальных платформ лейбла õzen.
+# Шаблон собирается один раз при импорте модуля
+_RELEASE_COVER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """Ты эксперт по требованиям к обложкам и фото для музыкальных платформ лейбла õzen.
 
 БАЗА ЗНАНИЙ:
 {knowledge_base}
@@ -99,18 +69,72 @@ class ReleaseCoverAgent:
 
 💡 Можно использовать разные фото с одного фотосета для разных платформ."
 """),
-            ("human", "{question}"),
-        ])
-        
-        response = self.llm_manager.invoke(
-            prompt,
-            question=question,
-            knowledge_base=self.knowledge_base
-        )
+    ("human", "{question}"),
+])
+
+
+class ReleaseCoverAgent:
+    """
+    Агент для ответов на вопросы о параметрах фото для релизов
+    """
+    
+    def __init__(self):
+        self.llm_manager = get_llm_manager()
+        self.knowledge_base = self._load_knowledge_base()
+        # База знаний статична - системное сообщение собираем один раз
+        self._system_message = _RELEASE_COVER_PROMPT.messages[0].format(knowledge_base=self.knowledge_base)
+        logger.info("✅ Инициализирован ReleaseCoverAgent")
+    
+    def _load_knowledge_base(self) -> str:
+        """Загружает базу знаний из release_cover.txt"""
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        faq_path = os.path.join(base_dir, 'services', 'faq', 'release_cover.txt')
         
-        logger.info(f"  ✓ Ответ сгенерирован ({len(response)} символов)")
+        try:
+            with open(faq_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            logger.info(f"  ✓ Загружена база знаний: {len(content)} символов")
+            return content
+        except Exception as e:
+            logger.error(f"  ✗ Ошибка загрузки базы знаний: {e}")
+            return ""
+    
+    def _messages(self, state: dict) -> list:
+        """Готовое системное сообщение + вопрос пользователя"""
+        return [self._system_message, HumanMessage(content=state['question'])]
+    
+    def _build_result(self, response: str) -> dict:
+        """Формирует обновление состояния из ответа LLM"""
+        logger.info("  ✓ Ответ сгенерирован (%d символов)", len(response))
         
         return {
             "answer": response,
             "agent_used": "release_cover"
         }
+    
+    def answer(self, state: dict) -> dict:
+        """
+        Отвечает на вопрос о параметрах фото на основе базы знаний
+        """
+        logger.info("→ ReleaseCoverAgent обрабатывает вопрос")
+        
+        response = self.llm_manager.invoke_messages(self._messages(state))
+        return self._build_result(response)
+    
+    async def aanswer(self, state: dict) -> dict:
+        """
+        Асинхронная версия answer
+        """
+        logger.info("→ ReleaseCoverAgent обрабатывает вопрос")
+        
+        response = await self.llm_manager.ainvoke_messages(self._messages(state))
+        return self._build_result(response)
+    
+    async def astream_answer(self, state: dict):
+        """
+        Потоковая версия answer: отдает ответ по частям
+        """
+        logger.info("→ ReleaseCoverAgent обрабатывает вопрос")
+        
+        async for chunk in self.llm_manager.astream_messages(self._messages(state)):
+            yield chunk
@@ -0,0 +1,25 @@
+"""
+Утилиты для разбора JSON из ответов LLM
+"""
+
+import json
+
+_DECODER = json.JSONDecoder()
+
+
+def extract_json_object(text: str) -> dict:
+    """
+    Находит первый JSON-объект в ответе LLM.
+    Терпим к markdown-ограждениям (```json) и тексту до/после объекта.
+    Бросает json.JSONDecodeError, если объект не найден.
+    """
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = _DECODER.raw_decode(text, start)
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    raise json.JSONDecodeError("JSON object not found", text, 0)
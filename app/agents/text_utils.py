@@ -0,0 +1,12 @@
+"""
+Нормализация пользовательских вопросов для ключей кэша
+"""
+
+import re
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Приводит вопрос к каноничному виду: без регистра и лишних пробелов"""
+    return _WHITESPACE.sub(" ", question.strip().casefold())
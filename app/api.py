@@ -1,11 +1,25 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from brotli_asgi import BrotliMiddleware
+from prometheus_client import make_asgi_app
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 from app.agents.WorkflowManager import WorkflowManager
+from app.services.analytics_service import AnalyticsService
+from app import executors
 from app.routers import analytics, artist_analytics, data_management, reports
+from app.dependencies import get_workflow_manager
 import logging
+import logging.handlers
+import queue
+import atexit
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,21 +29,101 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+
+# Move log I/O to a background thread: request handlers only enqueue records
+_root_logger = logging.getLogger()
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, *_root_logger.handlers, respect_handler_level=True
+)
+_root_logger.handlers = [logging.handlers.QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create heavy services once the event loop is running, in parallel"""
+    # Size the default thread pool used for blocking work (asyncio.to_thread)
+    max_workers = int(os.getenv("THREAD_POOL_WORKERS", str(min(32, (os.cpu_count() or 1) * 4))))
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_workers))
+    logger.info(f"✅ Default thread pool: {max_workers} workers")
+    cpu_pool, io_pool = executors.start()
+    app.state.cpu_pool = cpu_pool
+    app.state.io_pool = io_pool
+    logger.info(f"✅ Analytics pools: {executors.CPU_WORKERS} CPU / {executors.IO_WORKERS} IO workers")
+    
+    workflow_manager, analytics_service = await asyncio.gather(
+        asyncio.to_thread(WorkflowManager),
+        asyncio.to_thread(AnalyticsService),
+        return_exceptions=True
+    )
+    if isinstance(workflow_manager, Exception):
+        raise workflow_manager
+    
+    # Analytics is optional: its endpoints answer 500 if the database is unavailable
+    if isinstance(analytics_service, Exception):
+        logger.error(f"❌ Failed to initialize analytics service: {str(analytics_service)}")
+        analytics_service = None
+    else:
+        logger.info("✅ Analytics service initialized successfully")
+        # Warm up the query path before serving the first request
+        try:
+            await executors.run_io(analytics_service.warmup)
+            logger.info("✅ Analytics service warmed up")
+        except Exception as e:
+            logger.warning(f"⚠️ Analytics warmup failed: {str(e)}")
+    
+    app.state.workflow_manager = workflow_manager
+    app.state.analytics_service = analytics_service
+    app.state.analytics_batcher = analytics.AggregationBatcher(analytics_service)
+    
+    # Precomputed analytics rollups: built on startup if stale, refreshed periodically
+    rollup_task = None
+    if analytics_service is not None:
+        rollup_task = asyncio.create_task(analytics.rollup_refresh_loop(analytics_service))
+    
+    yield
+    
+    if rollup_task is not None:
+        rollup_task.cancel()
+    executors.shutdown()
+
+
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     title="Music Analyzer Agent API",
     description="API for music analytics and AI-powered queries",
     version="1.0.0"
 )
 
-# CORS
+# CORS: explicit dashboard origins (comma-separated) or a regex; "*" only without credentials
+_cors_origins = [o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip()]
+_cors_origin_regex = os.getenv("CORS_ORIGIN_REGEX") or None
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=_cors_origins,
+    allow_origin_regex=_cors_origin_regex,
+    allow_credentials="*" not in _cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # browsers cache preflight responses for a day
+)
+
+# HTTP caching (ETag / Cache-Control) for analytics GETs
+app.middleware("http")(analytics.http_cache_middleware)
+
+# Compress JSON responses (brotli, with gzip fallback for older clients).
+# Analytics responses are served pre-compressed from the endpoint cache.
+app.add_middleware(
+    BrotliMiddleware,
+    quality=4,
+    minimum_size=1024,
+    gzip_fallback=True,
+    excluded_handlers=[r"^/analytics/"]
 )
 
 # Include routers
@@ -38,8 +132,8 @@ app.include_router(artist_analytics.router)
 app.include_router(data_management.router)
 app.include_router(reports.router)
 
-# Initialize agent
-workflow_manager = WorkflowManager()
+# Prometheus metrics (analytics endpoint latency histograms)
+app.mount("/metrics", make_asgi_app())
 
 
 class QueryRequest(BaseModel):
@@ -49,30 +143,45 @@ class QueryRequest(BaseModel):
 
 
 @app.post("/query")
-async def query(request: QueryRequest):
+async def query(request: QueryRequest, workflow_manager: WorkflowManager = Depends(get_workflow_manager)):
     """Run agent on question"""
-    logger.info("=" * 80)
-    logger.info("=== ПОЛУЧЕН НОВЫЙ ЗАПРОС /query ===")
-    logger.info(f"Вопрос: {request.question}")
-    logger.info(f"UUID: {request.uuid}")
-    logger.info(f"Артист: {request.artist_name or 'Не указан'}")
-    logger.info("=" * 80)
+    started = time.perf_counter()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"/query: вопрос={request.question!r} артист={request.artist_name or 'Не указан'}")
     
     try:
-        result = workflow_manager.run_tool_agent(
+        result = await workflow_manager.run_agent_workflow_async(
             question=request.question,
             uuid=request.uuid,
             artist_name=request.artist_name
         )
-        logger.info("=" * 80)
-        logger.info("=== ЗАПРОС УСПЕШНО ОБРАБОТАН ===")
-        logger.info(f"Инструмент: {result.get('tool_used', 'N/A')}")
-        logger.info(f"Ответ: {result.get('answer', 'N/A')[:200]}...")
-        logger.info("=" * 80)
-        return result
     except Exception as e:
-        logger.error("=" * 80)
-        logger.error("=== ОШИБКА ПРИ ОБРАБОТКЕ ЗАПРОСА ===")
-        logger.error(f"Ошибка: {str(e)}", exc_info=True)
-        logger.error("=" * 80)
+        logger.error(
+            "❌ query.failed uuid=%s q_len=%d error=%s",
+            request.uuid, len(request.question), e, exc_info=True
+        )
         raise
+    
+    logger.info(
+        "✅ query.done uuid=%s agent=%s q_len=%d %.3fs",
+        request.uuid, result.get('agent_used') or 'N/A', len(request.question),
+        time.perf_counter() - started
+    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Ответ: {result.get('answer', 'N/A')[:200]}...")
+    return result
+
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest, workflow_manager: WorkflowManager = Depends(get_workflow_manager)):
+    """Run agent on question and stream the answer as plain text chunks"""
+    logger.info("▶️ query.stream uuid=%s q_len=%d", request.uuid, len(request.question))
+    
+    return StreamingResponse(
+        workflow_manager.stream_agent_workflow(
+            question=request.question,
+            uuid=request.uuid,
+            artist_name=request.artist_name
+        ),
+        media_type="text/plain; charset=utf-8"
+    )
@@ -0,0 +1,35 @@
+"""
+FastAPI dependencies for services created in the application lifespan
+"""
+
+from fastapi import HTTPException, Request
+
+
+def get_workflow_manager(request: Request):
+    """Multi-agent workflow created at startup"""
+    return request.app.state.workflow_manager
+
+
+def get_analytics_service(request: Request):
+    """Analytics service created at startup (500 if initialization failed)"""
+    service = getattr(request.app.state, "analytics_service", None)
+    if service is None:
+        raise HTTPException(status_code=500, detail="Analytics service not initialized")
+    return service
+
+
+def get_analytics_batcher(request: Request):
+    """Aggregation batcher bound to the analytics service"""
+    get_analytics_service(request)
+    return request.app.state.analytics_batcher
+
+
+def get_report_generator(request: Request):
+    """PDF report generator, built on first use and shared across requests"""
+    generator = getattr(request.app.state, "report_generator", None)
+    if generator is None:
+        # Heavy import (matplotlib/reportlab) deferred until reports are actually used
+        from app.utils.artist_report_generator import ArtistReportGenerator
+        generator = ArtistReportGenerator(get_analytics_service(request))
+        request.app.state.report_generator = generator
+    return generator
@@ -0,0 +1,49 @@
+"""
+Dedicated thread pools for blocking analytics work
+
+CPU-bound work (serialization, compression) runs on cpu_count threads so it doesn't
+oversubscribe cores; database-bound work (SQL + aggregation) is capped at the number
+of per-thread database connections we want open at once.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+CPU_WORKERS = int(os.getenv("ANALYTICS_CPU_WORKERS", str(os.cpu_count() or 1)))
+IO_WORKERS = int(os.getenv("ANALYTICS_IO_WORKERS", "8"))
+
+_pools = {"cpu": None, "io": None}
+
+
+def start():
+    """Create both pools (called from the application lifespan)"""
+    _pools["cpu"] = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="analytics-cpu")
+    _pools["io"] = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="analytics-io")
+    return _pools["cpu"], _pools["io"]
+
+
+def shutdown():
+    for name, pool in _pools.items():
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pools[name] = None
+
+
+async def _run(pool_name: str, func, *args, **kwargs):
+    pool = _pools[pool_name]
+    if pool is None:
+        # Pools not started (scripts, tests): fall back to the default executor
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+
+async def run_cpu(func, *args, **kwargs):
+    """Run CPU-bound func in the CPU pool"""
+    return await _run("cpu", func, *args, **kwargs)
+
+
+async def run_io(func, *args, **kwargs):
+    """Run database-bound func in the IO pool"""
+    return await _run("io", func, *args, **kwargs)
@@ -3,27 +3,303 @@ Analytics API Router
 Provides comprehensive analytics endpoints for frontend visualization
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import Optional
-from app.services.analytics_service import AnalyticsService
+from app.agents.ttl_cache import TTLCache
+from app.dependencies import get_analytics_batcher
+from app.executors import run_cpu, run_io
+from prometheus_client import Histogram
+import asyncio
+import brotli
+import contextvars
+import functools
+import gzip
+import inspect
+import hashlib
+import time
 import logging
+import orjson
+import os
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
-# Initialize analytics service
-try:
-    analytics_service = AnalyticsService()
-    logger.info("✅ Analytics service initialized successfully")
-except Exception as e:
-    logger.error(f"❌ Failed to initialize analytics service: {str(e)}")
-    analytics_service = None
+# In-process response cache: dashboards keep requesting the same
+# low-cardinality parameter combinations, while the data changes rarely
+_response_cache = TTLCache(
+    maxsize=int(os.getenv("ANALYTICS_CACHE_MAXSIZE", "512")),
+    ttl=float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+)
+_inflight = {}
+_background_tasks = set()
+
+# Dataset version for HTTP ETags: process start + bump on every invalidation
+_dataset_version = [int(time.time()), 0]
+CACHE_CONTROL = os.getenv("ANALYTICS_CACHE_CONTROL", "public, max-age=300, stale-while-revalidate=60")
+
+# Handler parameters injected via Depends (not part of the cache key)
+_DEPENDENCY_PARAMS = {"batcher"}
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Bodies at least this large are also cached pre-compressed (gzip, brotli)
+_COMPRESS_MIN_SIZE = 1024
+
+# Accept-Encoding of the current request, set by http_cache_middleware
+_accept_encoding = contextvars.ContextVar("accept_encoding", default="")
+
+# Per-endpoint latency, split by cache hit/miss (exposed on /metrics)
+ENDPOINT_SECONDS = Histogram(
+    "analytics_endpoint_seconds",
+    "Analytics endpoint latency",
+    ["endpoint", "cached"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+)
+SLOW_SECONDS = float(os.getenv("ANALYTICS_SLOW_MS", "500")) / 1000
+
+
+def _encode(result) -> dict:
+    """Serialize once and pre-compress, so cache hits pay for neither"""
+    body = orjson.dumps(result, option=_ORJSON_OPTIONS)
+    encoded = {"identity": body}
+    if len(body) >= _COMPRESS_MIN_SIZE:
+        encoded["br"] = brotli.compress(body, quality=4)
+        encoded["gzip"] = gzip.compress(body, compresslevel=6)
+    return encoded
+
+
+def _encoded_response(encoded: dict) -> Response:
+    """Pick the best pre-compressed body the client accepts"""
+    accept = _accept_encoding.get()
+    for encoding in ("br", "gzip"):
+        if encoding in encoded and encoding in accept:
+            return Response(
+                content=encoded[encoding],
+                media_type="application/json",
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+            )
+    return Response(content=encoded["identity"], media_type="application/json")
+
+
+def _drop_inflight(key, entry, _task):
+    """Done callback: forget the entry unless invalidate_cache() already replaced it"""
+    if _inflight.get(key) is entry:
+        del _inflight[key]
+
+
+def cached_endpoint(func):
+    """
+    Cache endpoint results by (endpoint name, query parameters).
+    Results are stored as pre-serialized (and pre-compressed) JSON bytes,
+    so a cache hit skips encoding entirely.
+    Concurrent misses for the same key share a single in-flight computation.
+    """
+    async def compute(**kwargs) -> dict:
+        return await run_cpu(_encode, await func(**kwargs))
+    
+    @functools.wraps(func)
+    async def wrapper(**kwargs):
+        started = time.perf_counter()
+        params = tuple(sorted((k, v) for k, v in kwargs.items() if k not in _DEPENDENCY_PARAMS))
+        key = (func.__name__, params)
+        encoded = _response_cache.get(key)
+        cached = encoded is not None
+        if not cached:
+            # Check and insert happen without an await in between, so no lock is needed
+            # Entries are (task, dataset version the result is computed under)
+            entry = _inflight.get(key)
+            if entry is None:
+                task = asyncio.ensure_future(compute(**kwargs))
+                entry = (task, tuple(_dataset_version))
+                _inflight[key] = entry
+                task.add_done_callback(functools.partial(_drop_inflight, key, entry))
+            task, version = entry
+            
+            # shield: a disconnected client must not cancel the shared computation
+            encoded = await asyncio.shield(task)
+            # Results started before invalidate_cache() are served but not cached
+            if version == tuple(_dataset_version):
+                _response_cache.set(key, encoded)
+        
+        elapsed = time.perf_counter() - started
+        ENDPOINT_SECONDS.labels(func.__name__, str(cached).lower()).observe(elapsed)
+        if not cached and elapsed > SLOW_SECONDS:
+            logger.warning("🐢 slow analytics: %s %s %.3fs", func.__name__, dict(params), elapsed)
+        
+        return _encoded_response(encoded)
+    
+    return wrapper
+
+
+class AggregationBatcher:
+    """
+    Runs analytics aggregations in the IO thread pool, each in its own run_io call.
+    Only aggregates that share a table scan (self.service.TREND_METHODS) are bundled:
+    trend requests arriving while a trend computation is running are queued and
+    run together as one self.service.compute_bundle call when it finishes.
+    A trend request with nothing in flight runs immediately.
+    """
+    
+    def __init__(
+        self,
+        service,
+        max_batch: int = int(os.getenv("ANALYTICS_BATCH_MAX", "16"))
+    ):
+        self.service = service
+        self.max_batch = max_batch
+        self._pending = []
+        self._active = 0
+        self._tasks = set()
+    
+    async def request(self, aggregate_name: str, params: dict):
+        # Slowly-changing aggregates are served from precomputed rollups
+        rollup = self.service.get_rollup(aggregate_name, params)
+        if rollup is not None:
+            return rollup
+        
+        # Unrelated aggregates: own thread (and SQLite connection), no waiting
+        if aggregate_name not in self.service.TREND_METHODS:
+            return await run_io(getattr(self.service, aggregate_name), **params)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((aggregate_name, params, future))
+        if self._active == 0 or len(self._pending) >= self.max_batch:
+            self._flush()
+        return await future
+    
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        if pending:
+            self._active += 1
+            task = asyncio.ensure_future(self._run(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, pending: list):
+        specs = [(name, params) for name, params, _ in pending]
+        try:
+            if len(specs) == 1:
+                name, params = specs[0]
+                results = [await run_io(getattr(self.service, name), **params)]
+            else:
+                results = await run_io(self.service.compute_bundle, specs)
+        except Exception as e:
+            if len(specs) == 1:
+                results = [e]
+            else:
+                # Bundle failed: retry individually so one bad aggregate doesn't fail the rest
+                logger.warning(f"⚠️ Batched aggregation failed, running separately: {str(e)}")
+                results = await asyncio.gather(
+                    *(run_io(getattr(self.service, name), **params) for name, params in specs),
+                    return_exceptions=True
+                )
+        finally:
+            self._active -= 1
+            # Requests queued behind this run go out together
+            if self._active == 0:
+                self._flush()
+        
+        for (_, _, future), result in zip(pending, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+async def refresh_rollups(service):
+    """Recompute precomputed rollups in the thread pool, then drop cached responses"""
+    try:
+        await run_io(service.refresh_rollups)
+    except Exception as e:
+        logger.error(f"❌ Failed to refresh analytics rollups: {str(e)}")
+    invalidate_cache()
+
+
+async def rollup_refresh_loop(service, interval: float = float(os.getenv("ANALYTICS_ROLLUP_INTERVAL", "86400"))):
+    """Background loop: build rollups if missing or stale, then refresh them periodically"""
+    if not await run_io(service.load_rollups):
+        await refresh_rollups(service)
+    while True:
+        await asyncio.sleep(interval)
+        await refresh_rollups(service)
+
+
+def schedule_rollup_refresh(app):
+    """Refresh rollups in the background after new data is ingested"""
+    invalidate_cache()
+    service = getattr(app.state, "analytics_service", None)
+    if service is not None:
+        task = asyncio.ensure_future(refresh_rollups(service))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+def invalidate_cache():
+    """Drop all cached analytics responses (called after data changes)"""
+    _response_cache.clear()
+    _inflight.clear()
+    _dataset_version[1] += 1
+    logger.info("🧹 Analytics response cache cleared")
+
+
+def _etag(url: str) -> str:
+    digest = hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+    return f'W/"{_dataset_version[0]}.{_dataset_version[1]}:{digest}"'
+
+
+async def http_cache_middleware(request, call_next):
+    """
+    ETag + Cache-Control for analytics GETs.
+    The ETag depends only on the dataset version and the URL, so a matching
+    If-None-Match is answered with 304 without running the handler.
+    """
+    if request.method != "GET" or not request.url.path.startswith(router.prefix + "/"):
+        return await call_next(request)
+    
+    path = request.url.path
+    query = request.url.query
+    etag = _etag(f"{path}?{query}" if query else path)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    
+    _accept_encoding.set(request.headers.get("accept-encoding", ""))
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
 
 
-@router.get("/overview")
-async def get_overview():
+@router.post("/cache/invalidate")
+async def invalidate_analytics_cache():
+    """
+    Clear the analytics response cache
+    
+    Call after new data has been loaded so the next requests recompute results
     """
+    invalidate_cache()
+    return {"success": True, "message": "Analytics cache cleared"}
+
+
+def _query_param(name: str, annotation, query) -> inspect.Parameter:
+    """Query parameter declaration for a generated handler signature"""
+    return inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, default=query, annotation=annotation)
+
+
+_BATCHER_PARAM = inspect.Parameter(
+    "batcher", inspect.Parameter.KEYWORD_ONLY,
+    default=Depends(get_analytics_batcher), annotation=AggregationBatcher
+)
+
+# (path, handler name, service method, query parameters, description)
+ENDPOINTS = [
+    ("/overview", "get_overview", "get_overview_stats", [], """
     Get high-level overview statistics
     
     Returns:
@@ -35,100 +311,46 @@ async def get_overview():
     - total_countries: Number of countries
     - avg_cpm: Average CPM (cost per 1000 streams)
     - date_range: Data date range
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_overview_stats()
-    except Exception as e:
-        logger.error(f"Error in get_overview: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/trends/yearly")
-async def get_yearly_trends():
-    """
+    """),
+    ("/trends/yearly", "get_yearly_trends", "get_yearly_trends", [], """
     Get year-over-year trends
     
     Returns yearly data with:
     - revenue, streams, artists count
     - YoY growth percentages
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_yearly_trends()
-    except Exception as e:
-        logger.error(f"Error in get_yearly_trends: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/trends/monthly")
-async def get_monthly_trends(year: Optional[int] = Query(None, description="Filter by year")):
-    """
+    """),
+    ("/trends/monthly", "get_monthly_trends", "get_monthly_trends", [
+        _query_param("year", Optional[int], Query(None, description="Filter by year"))
+    ], """
     Get monthly trends, optionally filtered by year
     
     Parameters:
     - year: Optional year filter
     
     Returns monthly data with revenue, streams, and CPM
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_monthly_trends(year=year)
-    except Exception as e:
-        logger.error(f"Error in get_monthly_trends: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/trends/quarterly")
-async def get_quarterly_trends():
-    """
+    """),
+    ("/trends/quarterly", "get_quarterly_trends", "get_quarterly_trends", [], """
     Get quarterly trends
     
     Returns quarterly revenue and streams data
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_quarterly_trends()
-    except Exception as e:
-        logger.error(f"Error in get_quarterly_trends: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/artists/top")
-async def get_top_artists(
-    limit: int = Query(20, ge=1, le=100, description="Number of results"),
-    metric: str = Query("revenue", regex="^(revenue|streams)$", description="Sort by revenue or streams")
-):
-    """
+    """),
+    ("/artists/top", "get_top_artists", "get_top_artists", [
+        _query_param("limit", int, Query(20, ge=1, le=100, description="Number of results")),
+        _query_param("metric", str, Query("revenue", regex="^(revenue|streams)$", description="Sort by revenue or streams")),
+        _query_param("offset", int, Query(0, ge=0, description="Number of ranked artists to skip"))
+    ], """
     Get top artists by revenue or streams
     
     Parameters:
     - limit: Number of artists to return (1-100)
     - metric: Sort by 'revenue' or 'streams'
+    - offset: Number of ranked artists to skip (pagination)
     
     Returns artist data with revenue, streams, tracks, platforms, countries, CPM
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_top_artists(limit=limit, metric=metric)
-    except Exception as e:
-        logger.error(f"Error in get_top_artists: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/artists/growth")
-async def get_artist_growth(limit: int = Query(20, ge=1, le=100)):
-    """
+    """),
+    ("/artists/growth", "get_artist_growth", "get_artist_growth_matrix", [
+        _query_param("limit", int, Query(20, ge=1, le=100))
+    ], """
     Get artist growth matrix (2023 vs 2024)
     
     Categorizes artists into:
@@ -141,20 +363,10 @@ async def get_artist_growth(limit: int = Query(20, ge=1, le=100)):
     
     Parameters:
     - limit: Number of artists per category
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_artist_growth_matrix(limit=limit)
-    except Exception as e:
-        logger.error(f"Error in get_artist_growth: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/artists/diversity")
-async def get_artist_diversity(limit: int = Query(20, ge=1, le=100)):
-    """
+    """),
+    ("/artists/diversity", "get_artist_diversity", "get_artist_diversity", [
+        _query_param("limit", int, Query(20, ge=1, le=100))
+    ], """
     Get artist diversification metrics
     
     Shows how diversified each artist is across:
@@ -164,44 +376,24 @@ async def get_artist_diversity(limit: int = Query(20, ge=1, le=100)):
     
     Parameters:
     - limit: Number of artists to return
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_artist_diversity(limit=limit)
-    except Exception as e:
-        logger.error(f"Error in get_artist_diversity: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/tracks/top")
-async def get_top_tracks(
-    limit: int = Query(20, ge=1, le=100),
-    metric: str = Query("revenue", regex="^(revenue|streams)$")
-):
-    """
+    """),
+    ("/tracks/top", "get_top_tracks", "get_top_tracks", [
+        _query_param("limit", int, Query(20, ge=1, le=100)),
+        _query_param("metric", str, Query("revenue", regex="^(revenue|streams)$")),
+        _query_param("offset", int, Query(0, ge=0))
+    ], """
     Get top tracks by revenue or streams
     
     Parameters:
     - limit: Number of tracks to return (1-100)
     - metric: Sort by 'revenue' or 'streams'
+    - offset: Number of ranked tracks to skip (pagination)
     
     Returns track data with artist, revenue, streams, CPM
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_top_tracks(limit=limit, metric=metric)
-    except Exception as e:
-        logger.error(f"Error in get_top_tracks: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/tracks/lifecycle")
-async def get_track_lifecycle(limit: int = Query(15, ge=1, le=50)):
-    """
+    """),
+    ("/tracks/lifecycle", "get_track_lifecycle", "get_track_lifecycle", [
+        _query_param("limit", int, Query(15, ge=1, le=50))
+    ], """
     Get track lifecycle analysis
     
     Returns:
@@ -210,60 +402,26 @@ async def get_track_lifecycle(limit: int = Query(15, ge=1, le=50)):
     
     Parameters:
     - limit: Number of tracks per category
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_track_lifecycle(limit=limit)
-    except Exception as e:
-        logger.error(f"Error in get_track_lifecycle: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/platforms")
-async def get_platform_stats(limit: int = Query(15, ge=1, le=50)):
-    """
+    """),
+    ("/platforms", "get_platform_stats", "get_platform_stats", [
+        _query_param("limit", int, Query(15, ge=1, le=50))
+    ], """
     Get platform statistics
     
     Returns platform data with revenue, streams, CPM
     
     Parameters:
     - limit: Number of platforms to return
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_platform_stats(limit=limit)
-    except Exception as e:
-        logger.error(f"Error in get_platform_stats: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/platforms/growth")
-async def get_platform_growth():
-    """
+    """),
+    ("/platforms/growth", "get_platform_growth", "get_platform_growth", [], """
     Get platform growth trends (2023 vs 2024)
     
     Returns platforms with year-over-year growth data
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_platform_growth()
-    except Exception as e:
-        logger.error(f"Error in get_platform_growth: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/countries")
-async def get_country_stats(
-    limit: int = Query(15, ge=1, le=50),
-    sort_by: str = Query("revenue", regex="^(revenue|cpm)$")
-):
-    """
+    """),
+    ("/countries", "get_country_stats", "get_country_stats", [
+        _query_param("limit", int, Query(15, ge=1, le=50)),
+        _query_param("sort_by", str, Query("revenue", regex="^(revenue|cpm)$"))
+    ], """
     Get country statistics
     
     Parameters:
@@ -271,40 +429,18 @@ async def get_country_stats(
     - sort_by: Sort by 'revenue' or 'cpm'
     
     Returns country data with revenue, streams, CPM
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_country_stats(limit=limit, sort_by=sort_by)
-    except Exception as e:
-        logger.error(f"Error in get_country_stats: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/countries/platform-cpm")
-async def get_country_platform_cpm(limit: int = Query(20, ge=1, le=50)):
-    """
+    """),
+    ("/countries/platform-cpm", "get_country_platform_cpm", "get_country_platform_cpm", [
+        _query_param("limit", int, Query(20, ge=1, le=50))
+    ], """
     Get CPM by country × platform combination
     
     Shows the best performing country-platform combinations by CPM
     
     Parameters:
     - limit: Number of combinations to return
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_country_platform_cpm(limit=limit)
-    except Exception as e:
-        logger.error(f"Error in get_country_platform_cpm: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/concentration")
-async def get_revenue_concentration():
-    """
+    """),
+    ("/concentration", "get_revenue_concentration", "get_revenue_concentration", [], """
     Get revenue concentration analysis
     
     Shows how revenue is concentrated among:
@@ -312,51 +448,46 @@ async def get_revenue_concentration():
     - Top 10, 50, 100 tracks
     
     Useful for understanding catalog dependency
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_revenue_concentration()
-    except Exception as e:
-        logger.error(f"Error in get_revenue_concentration: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/labels")
-async def get_label_stats(limit: int = Query(10, ge=1, le=50)):
-    """
+    """),
+    ("/labels", "get_label_stats", "get_label_stats", [
+        _query_param("limit", int, Query(10, ge=1, le=50))
+    ], """
     Get label statistics
     
     Returns label data with revenue, artists, tracks, CPM, revenue per artist
     
     Parameters:
     - limit: Number of labels to return
-    """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
-    
-    try:
-        return analytics_service.get_label_stats(limit=limit)
-    except Exception as e:
-        logger.error(f"Error in get_label_stats: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/sale-types")
-async def get_sale_type_stats():
-    """
+    """),
+    ("/sale-types", "get_sale_type_stats", "get_sale_type_stats", [], """
     Get sale type statistics
     
     Returns distribution of revenue and streams by sale type
     (e.g., streaming, download, etc.) with CPM
+    """),
+]
+
+
+def make_handler(name: str, method: str, params: list, doc: str):
     """
-    if not analytics_service:
-        raise HTTPException(status_code=500, detail="Analytics service not initialized")
+    Build a GET handler for one analytics aggregate:
+    cache lookup -> in-flight dedup -> batched service call -> pre-encoded response
+    """
+    async def handler(batcher: AggregationBatcher, **kwargs):
+        try:
+            return await batcher.request(method, kwargs)
+        except Exception as e:
+            logger.error(f"Error in {name}: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
     
-    try:
-        return analytics_service.get_sale_type_stats()
-    except Exception as e:
-        logger.error(f"Error in get_sale_type_stats: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    handler.__name__ = handler.__qualname__ = name
+    handler.__doc__ = doc
+    # FastAPI reads query parameters and dependencies from the signature
+    handler.__signature__ = inspect.Signature(params + [_BATCHER_PARAM])
+    return cached_endpoint(handler)
+
 
+for _path, _name, _method, _params, _doc in ENDPOINTS:
+    router.add_api_route(
+        _path, make_handler(_name, _method, _params, _doc), methods=["GET"], response_model=None
+    )
@@ -3,12 +3,18 @@ API для аналитики по артистам
 Эндпоинты для получения стримов, демографии и DSP статистики
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import Any, Optional, List
 import pandas as pd
 from pathlib import Path
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
+import functools
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+import os
+from app.agents.ttl_cache import TTLCache
+from app.executors import run_cpu
 
 router = APIRouter(prefix="/api/v1/artists", tags=["Artist Analytics"])
 
@@ -58,13 +64,177 @@ class ArtistAnalytics(BaseModel):
     top_tracks: List[TrackStats]
 
 
+# Сериализация ответов в JSON через Rust-ядро Pydantic v2 (без jsonable_encoder)
+_PAYLOAD_ADAPTER = TypeAdapter(Any)
+
+
+def json_response(payload: Any) -> Response:
+    """Ответ с уже сериализованным JSON (модели и словари с моделями)"""
+    return Response(content=_PAYLOAD_ADAPTER.dump_json(payload), media_type="application/json")
+
+
+# Кэш готовых ответов: дашборды повторяют одни и те же запросы (артист, период, top_n).
+# В ключе есть mtime файлов периода, поэтому после замены файла ответ пересчитывается
+_RESULTS_CACHE = TTLCache(
+    maxsize=int(os.getenv("ARTIST_CACHE_MAXSIZE", "10000")),
+    ttl=float(os.getenv("ARTIST_CACHE_TTL", "300"))
+)
+
+
+def cached_result(func):
+    """
+    Кэширует JSON-ответ эндпоинта по (эндпоинт, файлы периода, параметры запроса).
+    Ошибки (HTTPException) не кэшируются.
+    Сам эндпоинт синхронный (pandas) и при промахе выполняется в CPU-пуле,
+    попадание в кэш отдается прямо из event loop.
+    """
+    @functools.wraps(func)
+    async def wrapper(**kwargs):
+        key = (func.__name__, ArtistHelper.period_files(kwargs['period']), tuple(sorted(kwargs.items())))
+        body = _RESULTS_CACHE.get(key)
+        if body is None:
+            body = (await run_cpu(func, **kwargs)).body
+            _RESULTS_CACHE.set(key, body)
+        return Response(content=body, media_type="application/json")
+    
+    return wrapper
+
+
+_STATS_ADAPTERS = {model: TypeAdapter(List[model]) for model in (PlatformStats, CountryStats, TrackStats)}
+
+
+def stats_models(stats: pd.DataFrame, model, name_field: str, total_revenue: float) -> list:
+    """
+    Сгруппированная таблица (индекс - платформа/страна/трек) -> список моделей.
+    Колонки переводятся в списки целиком, валидация - одним вызовом TypeAdapter.
+    """
+    revenue = stats['revenue_clean']
+    if total_revenue > 0:
+        percentage = (revenue / total_revenue * 100).round(2).tolist()
+    else:
+        percentage = [0] * len(stats)
+    records = [
+        {name_field: name, "streams": streams, "revenue": rev, "percentage": pct}
+        for name, streams, rev, pct in zip(
+            stats.index.tolist(), stats['quantity_clean'].astype('int64').tolist(), revenue.tolist(), percentage
+        )
+    ]
+    return _STATS_ADAPTERS[model].validate_python(records)
+
+
+def _revenue_col(df: pd.DataFrame) -> str:
+    return 'Сумма вознаграждения' if 'Сумма вознаграждения' in df.columns else 'Revenue'
+
+
+def _quantity_col(df: pd.DataFrame) -> str:
+    return 'Количество' if 'Количество' in df.columns else 'Quantity'
+
+
+# Строковые колонки с повторяющимися значениями (храним как category)
+_CATEGORY_COLUMNS = (
+    'Платформа', 'Platform',
+    'страна / регион', 'Country',
+    'Исполнитель', 'Artist',
+    'Название трека', 'Track Name',
+)
+
+# Колонки отчета, которые используют эндпоинты (русские названия и английский вариант)
+_USED_COLUMNS = frozenset(_CATEGORY_COLUMNS + (
+    'Сумма вознаграждения', 'Revenue',
+    'Количество', 'Quantity',
+))
+
+# Колонки, которые суммируются при группировке
+_SUM_COLUMNS = ['quantity_clean', 'revenue_clean']
+
+
+@functools.lru_cache(maxsize=8)
+def _read_csv_files(files: tuple) -> pd.DataFrame:
+    """
+    Чтение и подготовка CSV один раз на набор файлов.
+    files: кортеж (путь, mtime) - при изменении файла ключ меняется и данные перечитываются.
+    Числовые колонки revenue_clean / quantity_clean считаются сразу для всех эндпоинтов.
+    Возвращаемый DataFrame общий для всех запросов - его нельзя изменять.
+    """
+    # decimal=',' - числа с запятой парсит C-парсер, без строкового round-trip
+    # usecols: остальные колонки отчета не токенизируются и не занимают память;
+    # строковые колонки парсер сразу собирает в category, без промежуточных объектов str
+    read = functools.partial(
+        pd.read_csv, sep=';', decimal=',', encoding='utf-8', quotechar='"', low_memory=False,
+        usecols=lambda column: column in _USED_COLUMNS,
+        dtype={column: 'category' for column in _CATEGORY_COLUMNS}
+    )
+    paths = [path for path, _ in files]
+    if len(paths) == 1:
+        dfs = [read(paths[0])]
+    else:
+        # Период "all": файлы читаются параллельно (токенизатор pandas отпускает GIL)
+        with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+            dfs = list(executor.map(read, paths))
+    df = dfs[0] if len(dfs) == 1 else pd.concat(dfs, ignore_index=True)
+    # Повторяющиеся строки храним как category: меньше памяти, groupby по целочисленным кодам.
+    # concat файлов с разными категориями дает object - приводим обратно
+    for column in _CATEGORY_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    revenue_col, quantity_col = _revenue_col(df), _quantity_col(df)
+    # Исходные колонки после очистки не нужны: срезы артиста копируют только нужное
+    return df.assign(
+        revenue_clean=ArtistHelper.clean_numeric(df, revenue_col),
+        quantity_clean=ArtistHelper.clean_numeric(df, quantity_col)
+    ).drop(columns=[revenue_col, quantity_col], errors='ignore')
+
+
+@functools.lru_cache(maxsize=8)
+def _artist_totals(files: tuple) -> pd.DataFrame:
+    """Итоговые стримы и доход по каждому артисту (индекс - имя в нижнем регистре)"""
+    df = _read_csv_files(files)
+    artist_col = 'Исполнитель' if 'Исполнитель' in df.columns else 'Artist'
+    return df.groupby(df[artist_col].str.lower(), sort=False)[_SUM_COLUMNS].sum()
+
+
+@functools.lru_cache(maxsize=32)
+def _artist_group_table(files: tuple, group_col: str) -> pd.DataFrame:
+    """
+    Суммы по (артист, group_col) для всех артистов сразу.
+    Считается один раз на набор файлов; эндпоинт берет срез артиста по отсортированному индексу.
+    """
+    df = _read_csv_files(files)
+    artist_col = 'Исполнитель' if 'Исполнитель' in df.columns else 'Artist'
+    return df.groupby([df[artist_col].str.lower(), group_col], observed=True)[_SUM_COLUMNS].sum()
+
+
+@functools.lru_cache(maxsize=8)
+def _artist_names(files: tuple) -> tuple:
+    """Уникальные имена артистов в порядке появления: кортеж (имя в нижнем регистре, имя)"""
+    df = _read_csv_files(files)
+    artist_col = 'Исполнитель' if 'Исполнитель' in df.columns else 'Artist'
+    return tuple((str(name).lower(), name) for name in df[artist_col].dropna().unique())
+
+
+# Последний ключ (путь, mtime) по каждому периоду: по его смене выбрасываем устаревшие кадры
+_PERIOD_KEYS = {}
+
+
+def _evict_stale_frames(period: str, files: tuple):
+    """
+    Файл периода изменился - сбрасываем кэши, построенные по файлам.
+    Иначе старые DataFrame (и производные таблицы) держались бы в lru_cache до вытеснения.
+    """
+    previous = _PERIOD_KEYS.get(period)
+    _PERIOD_KEYS[period] = files
+    if previous is not None and previous != files:
+        for cached in (_read_csv_files, _artist_totals, _artist_group_table, _artist_names):
+            cached.cache_clear()
+
+
 class ArtistHelper:
     """Вспомогательный класс для работы с данными артистов"""
     
     @staticmethod
-    def load_data(period: str = "q3_2025") -> pd.DataFrame:
+    def period_files(period: str) -> tuple:
         """
-        Загрузка данных за период
+        Файлы периода в виде ключа кэша: кортеж (путь, mtime)
         
         Args:
             period: Период данных (q3_2025, q4_2025, all)
@@ -81,17 +251,11 @@ class ArtistHelper:
         
         if period == "all":
             # Загружаем все файлы
-            dfs = []
-            for file_name in period_files.values():
-                file_path = data_dir / file_name
-                if file_path.exists():
-                    df = pd.read_csv(file_path, sep=';', encoding='utf-8', quotechar='"', low_memory=False)
-                    dfs.append(df)
+            paths = [data_dir / file_name for file_name in period_files.values()]
+            paths = [path for path in paths if path.exists()]
             
-            if not dfs:
+            if not paths:
                 raise HTTPException(status_code=404, detail="Данные не найдены")
-            
-            return pd.concat(dfs, ignore_index=True)
         
         else:
             # Загружаем конкретный файл
@@ -103,31 +267,57 @@ class ArtistHelper:
             if not file_path.exists():
                 raise HTTPException(status_code=404, detail=f"Файл не найден: {file_path}")
             
-            return pd.read_csv(file_path, sep=';', encoding='utf-8', quotechar='"', low_memory=False)
+            paths = [file_path]
+        
+        files = tuple((str(path), path.stat().st_mtime) for path in paths)
+        _evict_stale_frames(period, files)
+        return files
+    
+    @staticmethod
+    def load_data(period: str = "q3_2025") -> pd.DataFrame:
+        """
+        Загрузка данных за период (из кэша, если файлы не менялись)
+        
+        Args:
+            period: Период данных (q3_2025, q4_2025, all)
+        """
+        return _read_csv_files(ArtistHelper.period_files(period))
     
     @staticmethod
     def clean_numeric(df: pd.DataFrame, column: str) -> pd.Series:
-        """Очистка числовых колонок"""
+        """
+        Очистка числовых колонок. Обычно колонка уже числовая (decimal=',' при чтении CSV),
+        строковый разбор остается только для колонок со смешанными значениями
+        """
         if column not in df.columns:
-            return pd.Series([0] * len(df))
-        return df[column].astype(str).str.replace(',', '.').astype(float)
+            return pd.Series(0.0, index=df.index)
+        if pd.api.types.is_numeric_dtype(df[column]):
+            return df[column].astype(float, copy=False)
+        return pd.to_numeric(df[column].astype(str).str.replace(',', '.', regex=False), errors='coerce')
     
     @staticmethod
-    def get_artist_data(df: pd.DataFrame, artist_name: str) -> pd.DataFrame:
-        """Получение данных по артисту"""
-        artist_col = 'Исполнитель' if 'Исполнитель' in df.columns else 'Artist'
-        
-        # Фильтруем по артисту (регистронезависимый поиск)
-        artist_df = df[df[artist_col].str.lower() == artist_name.lower()]
-        
-        if artist_df.empty:
+    def get_artist_totals(period: str, artist_name: str) -> pd.Series:
+        """Итоги артиста за период: quantity_clean, revenue_clean"""
+        totals = _artist_totals(ArtistHelper.period_files(period))
+        try:
+            return totals.loc[artist_name.lower()]
+        except KeyError:
             raise HTTPException(status_code=404, detail=f"Артист '{artist_name}' не найден")
-        
-        return artist_df
+    
+    @staticmethod
+    def get_artist_groups(period: str, artist_name: str, group_col: str) -> pd.DataFrame:
+        """Суммы артиста по значениям group_col (платформы, страны, треки) из предрасчитанной таблицы"""
+        table = _artist_group_table(ArtistHelper.period_files(period), group_col)
+        try:
+            return table.loc[artist_name.lower()]
+        except KeyError:
+            # У артиста нет строк с заполненной колонкой group_col
+            return table.iloc[:0].droplevel(0)
 
 
-@router.get("/search")
-async def search_artists(
+@router.get("/search", response_model=None)
+@cached_result
+def search_artists(
     query: str = Query(..., min_length=2, description="Поисковый запрос (минимум 2 символа)"),
     period: str = Query("q3_2025", description="Период данных (q3_2025, q4_2025, all)"),
     limit: int = Query(20, ge=1, le=100, description="Максимум результатов")
@@ -138,21 +328,18 @@ async def search_artists(
     Возвращает список артистов, соответствующих поисковому запросу
     """
     try:
-        df = ArtistHelper.load_data(period)
-        artist_col = 'Исполнитель' if 'Исполнитель' in df.columns else 'Artist'
+        names = _artist_names(ArtistHelper.period_files(period))
         
-        # Поиск артистов (регистронезависимый)
-        matching_artists = df[df[artist_col].str.contains(query, case=False, na=False)][artist_col].unique()
+        # Поиск артистов (регистронезависимый) по уникальным именам, а не по всем строкам
+        query_lower = query.lower()
+        matching_artists = list(islice((name for lower, name in names if query_lower in lower), limit))
         
-        # Ограничиваем количество результатов
-        matching_artists = matching_artists[:limit]
-        
-        return {
+        return json_response({
             "query": query,
             "period": period,
             "count": len(matching_artists),
-            "artists": matching_artists.tolist()
-        }
+            "artists": matching_artists
+        })
     
     except HTTPException:
         raise
@@ -160,8 +347,9 @@ async def search_artists(
         raise HTTPException(status_code=500, detail=f"Ошибка поиска: {str(e)}")
 
 
-@router.get("/{artist_name}/streams")
-async def get_artist_streams(
+@router.get("/{artist_name}/streams", response_model=None, responses={200: {"model": StreamStats}})
+@cached_result
+def get_artist_streams(
     artist_name: str,
     period: str = Query("q3_2025", description="Период данных (q3_2025, q4_2025, all)")
 ):
@@ -171,26 +359,18 @@ async def get_artist_streams(
     Возвращает общее количество стримов, доход и среднюю цену за стрим
     """
     try:
-        df = ArtistHelper.load_data(period)
-        artist_df = ArtistHelper.get_artist_data(df, artist_name)
-        
-        # Очищаем числовые колонки
-        revenue_col = 'Сумма вознаграждения' if 'Сумма вознаграждения' in df.columns else 'Revenue'
-        quantity_col = 'Количество' if 'Количество' in df.columns else 'Quantity'
-        
-        artist_df['revenue_clean'] = ArtistHelper.clean_numeric(artist_df, revenue_col)
-        artist_df['quantity_clean'] = ArtistHelper.clean_numeric(artist_df, quantity_col)
+        totals = ArtistHelper.get_artist_totals(period, artist_name)
         
-        total_streams = int(artist_df['quantity_clean'].sum())
-        total_revenue = round(artist_df['revenue_clean'].sum(), 2)
+        total_streams = int(totals['quantity_clean'])
+        total_revenue = round(totals['revenue_clean'], 2)
         avg_per_stream = round(total_revenue / total_streams, 6) if total_streams > 0 else 0
         
-        return StreamStats(
+        return json_response(StreamStats(
             total_streams=total_streams,
             total_revenue=total_revenue,
             average_per_stream=avg_per_stream,
             period=period
-        )
+        ))
     
     except HTTPException:
         raise
@@ -198,8 +378,9 @@ async def get_artist_streams(
         raise HTTPException(status_code=500, detail=f"Ошибка получения стримов: {str(e)}")
 
 
-@router.get("/{artist_name}/platforms")
-async def get_artist_platforms(
+@router.get("/{artist_name}/platforms", response_model=None)
+@cached_result
+def get_artist_platforms(
     artist_name: str,
     period: str = Query("q3_2025", description="Период данных"),
     top_n: int = Query(10, ge=1, le=50, description="Количество топ платформ")
@@ -211,43 +392,26 @@ async def get_artist_platforms(
     """
     try:
         df = ArtistHelper.load_data(period)
-        artist_df = ArtistHelper.get_artist_data(df, artist_name)
+        total_revenue = ArtistHelper.get_artist_totals(period, artist_name)['revenue_clean']
         
         # Колонки
         platform_col = 'Платформа' if 'Платформа' in df.columns else 'Platform'
-        revenue_col = 'Сумма вознаграждения' if 'Сумма вознаграждения' in df.columns else 'Revenue'
-        quantity_col = 'Количество' if 'Количество' in df.columns else 'Quantity'
-        
-        # Очищаем числовые колонки
-        artist_df['revenue_clean'] = ArtistHelper.clean_numeric(artist_df, revenue_col)
-        artist_df['quantity_clean'] = ArtistHelper.clean_numeric(artist_df, quantity_col)
-        
-        # Группируем по платформам
-        platform_stats = artist_df.groupby(platform_col).agg({
-            'quantity_clean': 'sum',
-            'revenue_clean': 'sum'
-        }).round(2)
         
-        platform_stats = platform_stats.sort_values('revenue_clean', ascending=False).head(top_n)
+        # Группируем по платформам (предрасчитанные суммы артиста)
+        platform_stats = ArtistHelper.get_artist_groups(period, artist_name, platform_col)
+        total_platforms = len(platform_stats)
         
-        total_revenue = artist_df['revenue_clean'].sum()
+        platform_stats = platform_stats.round(2).nlargest(top_n, 'revenue_clean')
         
         # Формируем результат
-        platforms = []
-        for platform, row in platform_stats.iterrows():
-            platforms.append(PlatformStats(
-                platform=platform,
-                streams=int(row['quantity_clean']),
-                revenue=float(row['revenue_clean']),
-                percentage=round((row['revenue_clean'] / total_revenue * 100), 2) if total_revenue > 0 else 0
-            ))
-        
-        return {
+        platforms = stats_models(platform_stats, PlatformStats, 'platform', total_revenue)
+        
+        return json_response({
             "artist": artist_name,
             "period": period,
-            "total_platforms": len(artist_df[platform_col].unique()),
+            "total_platforms": total_platforms,
             "top_platforms": platforms
-        }
+        })
     
     except HTTPException:
         raise
@@ -255,8 +419,9 @@ async def get_artist_platforms(
         raise HTTPException(status_code=500, detail=f"Ошибка получения платформ: {str(e)}")
 
 
-@router.get("/{artist_name}/geography")
-async def get_artist_geography(
+@router.get("/{artist_name}/geography", response_model=None)
+@cached_result
+def get_artist_geography(
     artist_name: str,
     period: str = Query("q3_2025", description="Период данных"),
     top_n: int = Query(15, ge=1, le=50, description="Количество топ стран")
@@ -268,43 +433,26 @@ async def get_artist_geography(
     """
     try:
         df = ArtistHelper.load_data(period)
-        artist_df = ArtistHelper.get_artist_data(df, artist_name)
+        total_revenue = ArtistHelper.get_artist_totals(period, artist_name)['revenue_clean']
         
         # Колонки
         country_col = 'страна / регион' if 'страна / регион' in df.columns else 'Country'
-        revenue_col = 'Сумма вознаграждения' if 'Сумма вознаграждения' in df.columns else 'Revenue'
-        quantity_col = 'Количество' if 'Количество' in df.columns else 'Quantity'
-        
-        # Очищаем числовые колонки
-        artist_df['revenue_clean'] = ArtistHelper.clean_numeric(artist_df, revenue_col)
-        artist_df['quantity_clean'] = ArtistHelper.clean_numeric(artist_df, quantity_col)
         
-        # Группируем по странам
-        country_stats = artist_df.groupby(country_col).agg({
-            'quantity_clean': 'sum',
-            'revenue_clean': 'sum'
-        }).round(2)
+        # Группируем по странам (предрасчитанные суммы артиста)
+        country_stats = ArtistHelper.get_artist_groups(period, artist_name, country_col)
+        total_countries = len(country_stats)
         
-        country_stats = country_stats.sort_values('revenue_clean', ascending=False).head(top_n)
-        
-        total_revenue = artist_df['revenue_clean'].sum()
+        country_stats = country_stats.round(2).nlargest(top_n, 'revenue_clean')
         
         # Формируем результат
-        countries = []
-        for country, row in country_stats.iterrows():
-            countries.append(CountryStats(
-                country=country,
-                streams=int(row['quantity_clean']),
-                revenue=float(row['revenue_clean']),
-                percentage=round((row['revenue_clean'] / total_revenue * 100), 2) if total_revenue > 0 else 0
-            ))
-        
-        return {
+        countries = stats_models(country_stats, CountryStats, 'country', total_revenue)
+        
+        return json_response({
             "artist": artist_name,
             "period": period,
-            "total_countries": len(artist_df[country_col].unique()),
+            "total_countries": total_countries,
             "top_countries": countries
-        }
+        })
     
     except HTTPException:
         raise
@@ -312,8 +460,9 @@ async def get_artist_geography(
         raise HTTPException(status_code=500, detail=f"Ошибка получения географии: {str(e)}")
 
 
-@router.get("/{artist_name}/tracks")
-async def get_artist_tracks(
+@router.get("/{artist_name}/tracks", response_model=None)
+@cached_result
+def get_artist_tracks(
     artist_name: str,
     period: str = Query("q3_2025", description="Период данных"),
     top_n: int = Query(10, ge=1, le=50, description="Количество топ треков")
@@ -325,43 +474,26 @@ async def get_artist_tracks(
     """
     try:
         df = ArtistHelper.load_data(period)
-        artist_df = ArtistHelper.get_artist_data(df, artist_name)
+        total_revenue = ArtistHelper.get_artist_totals(period, artist_name)['revenue_clean']
         
         # Колонки
         track_col = 'Название трека' if 'Название трека' in df.columns else 'Track Name'
-        revenue_col = 'Сумма вознаграждения' if 'Сумма вознаграждения' in df.columns else 'Revenue'
-        quantity_col = 'Количество' if 'Количество' in df.columns else 'Quantity'
-        
-        # Очищаем числовые колонки
-        artist_df['revenue_clean'] = ArtistHelper.clean_numeric(artist_df, revenue_col)
-        artist_df['quantity_clean'] = ArtistHelper.clean_numeric(artist_df, quantity_col)
-        
-        # Группируем по трекам
-        track_stats = artist_df.groupby(track_col).agg({
-            'quantity_clean': 'sum',
-            'revenue_clean': 'sum'
-        }).round(2)
         
-        track_stats = track_stats.sort_values('revenue_clean', ascending=False).head(top_n)
+        # Группируем по трекам (предрасчитанные суммы артиста)
+        track_stats = ArtistHelper.get_artist_groups(period, artist_name, track_col)
+        total_tracks = len(track_stats)
         
-        total_revenue = artist_df['revenue_clean'].sum()
+        track_stats = track_stats.round(2).nlargest(top_n, 'revenue_clean')
         
         # Формируем результат
-        tracks = []
-        for track, row in track_stats.iterrows():
-            tracks.append(TrackStats(
-                track_name=track,
-                streams=int(row['quantity_clean']),
-                revenue=float(row['revenue_clean']),
-                percentage=round((row['revenue_clean'] / total_revenue * 100), 2) if total_revenue > 0 else 0
-            ))
-        
-        return {
+        tracks = stats_models(track_stats, TrackStats, 'track_name', total_revenue)
+        
+        return json_response({
             "artist": artist_name,
             "period": period,
-            "total_tracks": len(artist_df[track_col].unique()),
+            "total_tracks": total_tracks,
             "top_tracks": tracks
-        }
+        })
     
     except HTTPException:
         raise
@@ -369,8 +501,9 @@ async def get_artist_tracks(
         raise HTTPException(status_code=500, detail=f"Ошибка получения треков: {str(e)}")
 
 
-@router.get("/{artist_name}/analytics")
-async def get_artist_full_analytics(
+@router.get("/{artist_name}/analytics", response_model=None, responses={200: {"model": ArtistAnalytics}})
+@cached_result
+def get_artist_full_analytics(
     artist_name: str,
     period: str = Query("q3_2025", description="Период данных"),
     top_n: int = Query(10, ge=1, le=20, description="Количество топ элементов")
@@ -382,72 +515,36 @@ async def get_artist_full_analytics(
     """
     try:
         df = ArtistHelper.load_data(period)
-        artist_df = ArtistHelper.get_artist_data(df, artist_name)
+        totals = ArtistHelper.get_artist_totals(period, artist_name)
         
         # Колонки
         platform_col = 'Платформа' if 'Платформа' in df.columns else 'Platform'
         country_col = 'страна / регион' if 'страна / регион' in df.columns else 'Country'
         track_col = 'Название трека' if 'Название трека' in df.columns else 'Track Name'
-        revenue_col = 'Сумма вознаграждения' if 'Сумма вознаграждения' in df.columns else 'Revenue'
-        quantity_col = 'Количество' if 'Количество' in df.columns else 'Quantity'
         
-        # Очищаем числовые колонки
-        artist_df['revenue_clean'] = ArtistHelper.clean_numeric(artist_df, revenue_col)
-        artist_df['quantity_clean'] = ArtistHelper.clean_numeric(artist_df, quantity_col)
+        # Предрасчитанные суммы артиста по платформам, странам и трекам
+        track_stats = ArtistHelper.get_artist_groups(period, artist_name, track_col)
         
-        total_streams = int(artist_df['quantity_clean'].sum())
-        total_revenue = round(artist_df['revenue_clean'].sum(), 2)
-        total_tracks = len(artist_df[track_col].unique())
+        total_streams = int(totals['quantity_clean'])
+        total_revenue = round(totals['revenue_clean'], 2)
+        total_tracks = len(track_stats)
         
         # Топ платформы
-        platform_stats = artist_df.groupby(platform_col).agg({
-            'quantity_clean': 'sum',
-            'revenue_clean': 'sum'
-        }).sort_values('revenue_clean', ascending=False).head(top_n)
-        
-        top_platforms = [
-            PlatformStats(
-                platform=platform,
-                streams=int(row['quantity_clean']),
-                revenue=float(row['revenue_clean']),
-                percentage=round((row['revenue_clean'] / total_revenue * 100), 2)
-            )
-            for platform, row in platform_stats.iterrows()
-        ]
+        platform_stats = ArtistHelper.get_artist_groups(period, artist_name, platform_col).nlargest(top_n, 'revenue_clean')
+        
+        top_platforms = stats_models(platform_stats, PlatformStats, 'platform', total_revenue)
         
         # Топ страны
-        country_stats = artist_df.groupby(country_col).agg({
-            'quantity_clean': 'sum',
-            'revenue_clean': 'sum'
-        }).sort_values('revenue_clean', ascending=False).head(top_n)
-        
-        top_countries = [
-            CountryStats(
-                country=country,
-                streams=int(row['quantity_clean']),
-                revenue=float(row['revenue_clean']),
-                percentage=round((row['revenue_clean'] / total_revenue * 100), 2)
-            )
-            for country, row in country_stats.iterrows()
-        ]
+        country_stats = ArtistHelper.get_artist_groups(period, artist_name, country_col).nlargest(top_n, 'revenue_clean')
+        
+        top_countries = stats_models(country_stats, CountryStats, 'country', total_revenue)
         
         # Топ треки
-        track_stats = artist_df.groupby(track_col).agg({
-            'quantity_clean': 'sum',
-            'revenue_clean': 'sum'
-        }).sort_values('revenue_clean', ascending=False).head(top_n)
-        
-        top_tracks = [
-            TrackStats(
-                track_name=track,
-                streams=int(row['quantity_clean']),
-                revenue=float(row['revenue_clean']),
-                percentage=round((row['revenue_clean'] / total_revenue * 100), 2)
-            )
-            for track, row in track_stats.iterrows()
-        ]
-        
-        return ArtistAnalytics(
+        track_stats = track_stats.nlargest(top_n, 'revenue_clean')
+        
+        top_tracks = stats_models(track_stats, TrackStats, 'track_name', total_revenue)
+        
+        return json_response(ArtistAnalytics(
             artist_name=artist_name,
             period=period,
             total_streams=total_streams,
@@ -456,7 +553,7 @@ async def get_artist_full_analytics(
             top_platforms=top_platforms,
             top_countries=top_countries,
             top_tracks=top_tracks
-        )
+        ))
     
     except HTTPException:
         raise
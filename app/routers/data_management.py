@@ -3,14 +3,17 @@ Data Management API Router
 Provides endpoints for uploading and managing CSV data files
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 from fastapi.responses import JSONResponse
 from typing import List
 import os
+import asyncio
 import shutil
+import json
 import pandas as pd
 from datetime import datetime
 import logging
+from app.routers.analytics import schedule_rollup_refresh
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +29,72 @@ PROCESSED_DATA_DIR = os.path.join(
 # Ensure the directory exists
 os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
 
+# Upload copy chunk size (1 MiB)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Rows per chunk when counting CSV records
+CSV_COUNT_CHUNK_ROWS = 500_000
+
+
+def _csv_metadata(file_path: str):
+    """
+    Row count and column names without building the full frame:
+    header via read_csv(nrows=0), rows via the CSV parser over the first column only
+    (same count as len(pd.read_csv(...)): quoted multi-line fields and blank lines handled)
+    """
+    columns = pd.read_csv(file_path, nrows=0).columns.tolist()
+    
+    rows = 0
+    if columns:
+        for chunk in pd.read_csv(file_path, usecols=[0], dtype=str, chunksize=CSV_COUNT_CHUNK_ROWS):
+            rows += len(chunk)
+    
+    return rows, columns
+
+
+def _metadata_path(file_path: str) -> str:
+    return file_path + ".meta.json"
+
+
+def _file_metadata(file_path: str, mtime: float = None):
+    """
+    Row count and column names from the .meta.json sidecar.
+    Missing or stale sidecars are rebuilt once from the CSV.
+    """
+    meta_path = _metadata_path(file_path)
+    try:
+        if mtime is None:
+            mtime = os.path.getmtime(file_path)
+        if os.path.getmtime(meta_path) >= mtime:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return meta["rows"], meta["columns"]
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    rows, columns = _csv_metadata(file_path)
+    try:
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "columns": columns}, f, ensure_ascii=False)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not write metadata sidecar for {file_path}: {str(e)}")
+    return rows, columns
+
+
+def _copy_upload(src, file_path: str):
+    """Copy the spooled upload (memory or temp file) to disk in 1 MiB blocks"""
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(src, buffer, UPLOAD_CHUNK_SIZE)
+
+
+async def _save_upload(file: UploadFile, file_path: str):
+    """Stream an uploaded file to disk without blocking the event loop"""
+    await asyncio.to_thread(_copy_upload, file.file, file_path)
+
 
 @router.post("/upload-csv")
 async def upload_csv(
+    request: Request,
     file: UploadFile = File(..., description="CSV file to upload")
 ):
     """
@@ -59,16 +125,14 @@ async def upload_csv(
         file_path = os.path.join(PROCESSED_DATA_DIR, safe_filename)
         
         # Save the file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await _save_upload(file, file_path)
         
         logger.info(f"✅ File uploaded successfully: {file_path}")
+        schedule_rollup_refresh(request.app)
         
         # Read the CSV to get metadata
         try:
-            df = pd.read_csv(file_path)
-            rows = len(df)
-            columns = df.columns.tolist()
+            rows, columns = await asyncio.to_thread(_file_metadata, file_path)
             
             # Get file size
             file_size = os.path.getsize(file_path)
@@ -116,6 +180,7 @@ async def upload_csv(
 
 @router.post("/upload-csv-batch")
 async def upload_csv_batch(
+    request: Request,
     files: List[UploadFile] = File(..., description="Multiple CSV files to upload")
 ):
     """
@@ -129,65 +194,78 @@ async def upload_csv_batch(
     - failed: List of files that failed to upload
     - total: Total number of files processed
     """
+    # One timestamp per batch; the index keeps same-named files from colliding
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    async def upload_one(index: int, file: UploadFile) -> dict:
+        # Create a safe filename with timestamp
+        base_name = os.path.splitext(file.filename)[0]
+        safe_filename = f"{base_name}_{timestamp}_{index}.csv"
+        file_path = os.path.join(PROCESSED_DATA_DIR, safe_filename)
+        
+        # Save the file
+        await _save_upload(file, file_path)
+        
+        # Get metadata
+        try:
+            rows, columns = await asyncio.to_thread(_file_metadata, file_path)
+            file_size = os.path.getsize(file_path)
+            
+            entry = {
+                "filename": safe_filename,
+                "original_filename": file.filename,
+                "path": file_path,
+                "rows": rows,
+                "columns": columns,
+                "size_bytes": file_size,
+                "size_mb": round(file_size / (1024 * 1024), 2)
+            }
+        except Exception as e:
+            # Still count as uploaded even if metadata fails
+            file_size = os.path.getsize(file_path)
+            entry = {
+                "filename": safe_filename,
+                "original_filename": file.filename,
+                "path": file_path,
+                "size_bytes": file_size,
+                "size_mb": round(file_size / (1024 * 1024), 2),
+                "warning": f"Could not read metadata: {str(e)}"
+            }
+        
+        logger.info(f"✅ File uploaded: {safe_filename}")
+        return entry
+    
     uploaded = []
     failed = []
     
+    # Validate file extension
+    csv_files = []
     for file in files:
-        # Validate file extension
-        if not file.filename.endswith('.csv'):
+        if file.filename.endswith('.csv'):
+            csv_files.append(file)
+        else:
             failed.append({
                 "filename": file.filename,
                 "error": "Only CSV files are allowed"
             })
-            continue
-        
-        try:
-            # Create a safe filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            base_name = os.path.splitext(file.filename)[0]
-            safe_filename = f"{base_name}_{timestamp}.csv"
-            file_path = os.path.join(PROCESSED_DATA_DIR, safe_filename)
-            
-            # Save the file
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Get metadata
-            try:
-                df = pd.read_csv(file_path)
-                rows = len(df)
-                columns = df.columns.tolist()
-                file_size = os.path.getsize(file_path)
-                
-                uploaded.append({
-                    "filename": safe_filename,
-                    "original_filename": file.filename,
-                    "path": file_path,
-                    "rows": rows,
-                    "columns": columns,
-                    "size_bytes": file_size,
-                    "size_mb": round(file_size / (1024 * 1024), 2)
-                })
-            except Exception as e:
-                # Still count as uploaded even if metadata fails
-                file_size = os.path.getsize(file_path)
-                uploaded.append({
-                    "filename": safe_filename,
-                    "original_filename": file.filename,
-                    "path": file_path,
-                    "size_bytes": file_size,
-                    "size_mb": round(file_size / (1024 * 1024), 2),
-                    "warning": f"Could not read metadata: {str(e)}"
-                })
-            
-            logger.info(f"✅ File uploaded: {safe_filename}")
-            
-        except Exception as e:
-            logger.error(f"❌ Error uploading {file.filename}: {str(e)}")
+    
+    # Files are written concurrently
+    results = await asyncio.gather(
+        *(upload_one(index, file) for index, file in enumerate(csv_files)),
+        return_exceptions=True
+    )
+    for file, result in zip(csv_files, results):
+        if isinstance(result, Exception):
+            logger.error(f"❌ Error uploading {file.filename}: {str(result)}")
             failed.append({
                 "filename": file.filename,
-                "error": str(e)
+                "error": str(result)
             })
+        else:
+            uploaded.append(result)
+    
+    if uploaded:
+        schedule_rollup_refresh(request.app)
     
     return {
         "success": len(failed) == 0,
@@ -200,7 +278,7 @@ async def upload_csv_batch(
 
 
 @router.get("/list-files")
-async def list_files():
+def list_files():
     """
     List all CSV files in the data/processed directory
     
@@ -213,32 +291,36 @@ async def list_files():
         files = []
         total_size = 0
         
-        for filename in os.listdir(PROCESSED_DATA_DIR):
-            if filename.endswith('.csv'):
-                file_path = os.path.join(PROCESSED_DATA_DIR, filename)
-                file_size = os.path.getsize(file_path)
-                modified_time = os.path.getmtime(file_path)
-                
-                total_size += file_size
-                
-                # Try to get row count
-                try:
-                    df = pd.read_csv(file_path)
-                    rows = len(df)
-                    columns = len(df.columns)
-                except:
-                    rows = None
-                    columns = None
-                
-                files.append({
-                    "filename": filename,
-                    "path": file_path,
-                    "size_bytes": file_size,
-                    "size_mb": round(file_size / (1024 * 1024), 2),
-                    "modified_at": datetime.fromtimestamp(modified_time).isoformat(),
-                    "rows": rows,
-                    "columns": columns
-                })
+        # One directory pass; DirEntry caches its stat result
+        with os.scandir(PROCESSED_DATA_DIR) as entries:
+            csv_entries = [entry for entry in entries if entry.name.endswith('.csv') and entry.is_file()]
+        
+        for entry in csv_entries:
+            filename = entry.name
+            file_path = entry.path
+            stat = entry.stat()
+            file_size = stat.st_size
+            modified_time = stat.st_mtime
+            
+            total_size += file_size
+            
+            # Try to get row count
+            try:
+                rows, column_names = _file_metadata(file_path, modified_time)
+                columns = len(column_names)
+            except:
+                rows = None
+                columns = None
+            
+            files.append({
+                "filename": filename,
+                "path": file_path,
+                "size_bytes": file_size,
+                "size_mb": round(file_size / (1024 * 1024), 2),
+                "modified_at": datetime.fromtimestamp(modified_time).isoformat(),
+                "rows": rows,
+                "columns": columns
+            })
         
         # Sort by modified time (newest first)
         files.sort(key=lambda x: x['modified_at'], reverse=True)
@@ -259,7 +341,7 @@ async def list_files():
 
 
 @router.delete("/delete-file/{filename}")
-async def delete_file(filename: str):
+async def delete_file(filename: str, request: Request):
     """
     Delete a CSV file from data/processed directory
     
@@ -287,7 +369,10 @@ async def delete_file(filename: str):
     
     try:
         os.remove(file_path)
+        if os.path.exists(_metadata_path(file_path)):
+            os.remove(_metadata_path(file_path))
         logger.info(f"🗑️ File deleted: {filename}")
+        schedule_rollup_refresh(request.app)
         
         return {
             "success": True,
@@ -2,27 +2,43 @@
 Reports Router - Endpoints for PDF report generation and download
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Tuple
+from datetime import datetime
+from functools import lru_cache
+import asyncio
 import os
+import re
+import time
 from pathlib import Path
 import logging
+import numpy as np
+from app.dependencies import get_report_generator
+from app.executors import run_cpu
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
-# Define the reports directory
-REPORTS_DIR = os.path.join(
-    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-    "reports", 
-    "artist_reports"
-)
+# Define the reports directory (<project root>/reports/artist_reports)
+REPORTS_DIR = Path(__file__).resolve().parents[2] / "reports" / "artist_reports"
 
 # Ensure the directory exists
-os.makedirs(REPORTS_DIR, exist_ok=True)
+REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Report filenames: word characters (any script), dots and dashes, ending in .pdf
+_SAFE_PDF_NAME = re.compile(r'[\w.\-]+\.pdf')
+
+# Concurrent PDF builds: CPU-bound, so capped below the core count
+REPORTS_MAX_CONCURRENCY = int(os.getenv("REPORTS_MAX_CONCURRENCY", str(max(1, (os.cpu_count() or 1) // 2))))
+_PDF_SEM = asyncio.Semaphore(REPORTS_MAX_CONCURRENCY)
+
+
+class PDFFileResponse(FileResponse):
+    """FileResponse streaming in 1 MiB reads (Starlette default is 64 KiB)"""
+    chunk_size = 1024 * 1024
 
 
 class GenerateReportRequest(BaseModel):
@@ -31,8 +47,33 @@ class GenerateReportRequest(BaseModel):
     include_medialand: Optional[bool] = False
 
 
+class GenerateBatchRequest(BaseModel):
+    artist_names: List[str]
+    period: Optional[str] = "Q4 2025"
+    include_medialand: Optional[bool] = False
+
+
+async def _generate_one(generator, artist_name: str, period: str, include_medialand: bool) -> dict:
+    """Build one PDF in the CPU pool, bounded by _PDF_SEM"""
+    # Generate report (pandas + matplotlib + reportlab) off the event loop
+    async with _PDF_SEM:
+        result = await run_cpu(
+            generator.generate_report,
+            artist_name=artist_name,
+            period=period,
+            include_medialand=include_medialand
+        )
+    if result['success']:
+        result['pdf_url'] = f"/reports/download/{result['pdf_filename']}"
+        _invalidate_list_cache()
+    return result
+
+
 @router.post("/generate")
-async def generate_artist_report(request: GenerateReportRequest):
+async def generate_artist_report(
+    request: GenerateReportRequest,
+    generator=Depends(get_report_generator)
+):
     """
     Generate a PDF report for an artist
     
@@ -51,24 +92,11 @@ async def generate_artist_report(request: GenerateReportRequest):
     logger.info(f"📊 Generating report for artist: {request.artist_name}")
     
     try:
-        from app.services.analytics_service import AnalyticsService
-        from app.utils.artist_report_generator import ArtistReportGenerator
-        
-        # Initialize services
-        analytics = AnalyticsService()
-        generator = ArtistReportGenerator(analytics)
-        
-        # Generate report
-        result = generator.generate_report(
-            artist_name=request.artist_name,
-            period=request.period,
-            include_medialand=request.include_medialand
+        result = await _generate_one(
+            generator, request.artist_name, request.period, request.include_medialand
         )
         
         if result['success']:
-            # Add download URL
-            result['pdf_url'] = f"/reports/download/{result['pdf_filename']}"
-            
             logger.info(f"✅ Report generated: {result['pdf_filename']}")
             
             return JSONResponse(
@@ -98,6 +126,63 @@ async def generate_artist_report(request: GenerateReportRequest):
         )
 
 
+@router.post("/generate_batch")
+async def generate_artist_reports_batch(
+    request: GenerateBatchRequest,
+    generator=Depends(get_report_generator)
+):
+    """
+    Generate PDF reports for several artists concurrently
+    
+    Parameters:
+    - artist_names: Names of the artists
+    - period: Reporting period (default: "Q4 2025")
+    - include_medialand: Include Medialand data (default: False)
+    
+    Returns:
+    - results: Per-artist outcome (same fields as /generate, or error)
+    - success_count / failed_count
+    """
+    # Duplicates would only render the same PDF twice
+    artist_names = list(dict.fromkeys(request.artist_names))
+    logger.info(f"📊 Generating {len(artist_names)} reports in batch")
+    
+    outcomes = await asyncio.gather(
+        *(
+            _generate_one(generator, name, request.period, request.include_medialand)
+            for name in artist_names
+        ),
+        return_exceptions=True
+    )
+    
+    results = []
+    for name, outcome in zip(artist_names, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"❌ Error generating report for {name}: {str(outcome)}")
+            results.append({"success": False, "artist_name": name, "error": str(outcome)})
+        elif not outcome['success']:
+            results.append({"success": False, "artist_name": name, "error": outcome['error']})
+        else:
+            results.append({
+                "success": True,
+                "artist_name": outcome['artist_name'],
+                "pdf_filename": outcome['pdf_filename'],
+                "pdf_path": outcome['pdf_path'],
+                "pdf_url": outcome['pdf_url'],
+                "summary": outcome['summary']
+            })
+    
+    success_count = sum(1 for r in results if r['success'])
+    logger.info(f"✅ Batch done: {success_count}/{len(results)} reports generated")
+    
+    return {
+        "success": success_count > 0,
+        "results": results,
+        "success_count": success_count,
+        "failed_count": len(results) - success_count
+    }
+
+
 @router.get("/download/{filename}")
 async def download_report(filename: str):
     """
@@ -109,22 +194,19 @@ async def download_report(filename: str):
     Returns:
     - PDF file for download
     """
-    # Security check
-    if '..' in filename or '/' in filename or '\\' in filename:
+    # Security check: plain "<name>.pdf", no path separators
+    if not _SAFE_PDF_NAME.fullmatch(filename):
         raise HTTPException(
             status_code=400,
             detail="Invalid filename"
         )
     
-    if not filename.endswith('.pdf'):
-        raise HTTPException(
-            status_code=400,
-            detail="Only PDF files can be downloaded"
-        )
+    file_path = REPORTS_DIR / filename
     
-    file_path = os.path.join(REPORTS_DIR, filename)
-    
-    if not os.path.exists(file_path):
+    # One stat, off the event loop; FileResponse reuses it instead of stat'ing again
+    try:
+        st = await asyncio.to_thread(os.stat, file_path)
+    except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail=f"Report '{filename}' not found"
@@ -132,16 +214,81 @@ async def download_report(filename: str):
     
     logger.info(f"📥 Downloading report: {filename}")
     
-    return FileResponse(
+    return PDFFileResponse(
         path=file_path,
         media_type='application/pdf',
         filename=filename,
+        stat_result=st,
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
         }
     )
 
 
+# /list payload cache: (REPORTS_DIR mtime_ns, built_at, payload).
+# Adding/removing a report bumps the directory mtime; the TTL covers in-place rewrites.
+REPORTS_LIST_TTL = float(os.getenv("REPORTS_LIST_TTL", "60"))
+_LIST_CACHE: Optional[Tuple[int, float, dict]] = None
+_LIST_LOCK = asyncio.Lock()
+
+
+def _invalidate_list_cache():
+    global _LIST_CACHE
+    _LIST_CACHE = None
+
+
+@lru_cache(maxsize=1024)
+def _artist_from_filename(filename: str) -> str:
+    """Artist name from 'Artist_Name_Report_20260204_173424.pdf'"""
+    parts = filename.replace('.pdf', '').split('_Report_')
+    return parts[0].replace('_', ' ') if parts else 'Unknown'
+
+
+def _scan_reports_sync() -> dict:
+    """One scandir pass over REPORTS_DIR -> /list payload"""
+    # Parallel arrays instead of per-file dicts until the final sorted payload
+    names, sizes, mtimes = [], [], []
+    with os.scandir(REPORTS_DIR) as it:
+        for e in it:
+            if e.name.endswith('.pdf') and e.is_file():
+                st = e.stat()
+                names.append(e.name)
+                sizes.append(st.st_size)
+                mtimes.append(st.st_mtime)
+    
+    sizes = np.asarray(sizes, dtype=np.int64)
+    mtimes = np.asarray(mtimes, dtype=np.float64)
+    
+    # Newest first
+    order = np.argsort(-mtimes, kind='stable')
+    
+    reports = [
+        {
+            "filename": names[i],
+            "artist_name": _artist_from_filename(names[i]),
+            "download_url": f"/reports/download/{names[i]}",
+            "size_bytes": int(sizes[i]),
+            "size_mb": round(int(sizes[i]) / (1024 * 1024), 2),
+            "created_at": datetime.fromtimestamp(float(mtimes[i])).isoformat()
+        }
+        for i in order
+    ]
+    
+    return {
+        "success": True,
+        "reports": reports,
+        "total_count": len(reports),
+        "total_size_mb": round(int(sizes.sum()) / (1024 * 1024), 2)
+    }
+
+
+def _cached_list(dir_mt: int) -> Optional[dict]:
+    cached = _LIST_CACHE
+    if cached and cached[0] == dir_mt and time.monotonic() - cached[1] < REPORTS_LIST_TTL:
+        return cached[2]
+    return None
+
+
 @router.get("/list")
 async def list_reports():
     """
@@ -152,42 +299,22 @@ async def list_reports():
     - total_count: Total number of reports
     - total_size_mb: Total size of all reports
     """
+    global _LIST_CACHE
     try:
-        reports = []
-        total_size = 0
-        
-        for filename in os.listdir(REPORTS_DIR):
-            if filename.endswith('.pdf'):
-                file_path = os.path.join(REPORTS_DIR, filename)
-                file_size = os.path.getsize(file_path)
-                modified_time = os.path.getmtime(file_path)
-                
-                from datetime import datetime
-                total_size += file_size
-                
-                # Parse artist name from filename
-                # Format: Artist_Name_Report_20260204_173424.pdf
-                parts = filename.replace('.pdf', '').split('_Report_')
-                artist_name = parts[0].replace('_', ' ') if parts else 'Unknown'
-                
-                reports.append({
-                    "filename": filename,
-                    "artist_name": artist_name,
-                    "download_url": f"/reports/download/{filename}",
-                    "size_bytes": file_size,
-                    "size_mb": round(file_size / (1024 * 1024), 2),
-                    "created_at": datetime.fromtimestamp(modified_time).isoformat()
-                })
+        # One stat per request while the directory is unchanged
+        dir_mt = os.stat(REPORTS_DIR).st_mtime_ns
+        payload = _cached_list(dir_mt)
+        if payload is not None:
+            return payload
         
-        # Sort by created time (newest first)
-        reports.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        return {
-            "success": True,
-            "reports": reports,
-            "total_count": len(reports),
-            "total_size_mb": round(total_size / (1024 * 1024), 2)
-        }
+        # Single rebuild for concurrent misses
+        async with _LIST_LOCK:
+            payload = _cached_list(dir_mt)
+            if payload is None:
+                # Directory scan is blocking: keep it off the event loop
+                payload = await asyncio.to_thread(_scan_reports_sync)
+                _LIST_CACHE = (dir_mt, time.monotonic(), payload)
+        return payload
         
     except Exception as e:
         logger.error(f"❌ Error listing reports: {str(e)}")
@@ -208,22 +335,16 @@ async def delete_report(filename: str):
     Returns:
     - success: Whether deletion was successful
     """
-    # Security check
-    if '..' in filename or '/' in filename or '\\' in filename:
+    # Security check: plain "<name>.pdf", no path separators
+    if not _SAFE_PDF_NAME.fullmatch(filename):
         raise HTTPException(
             status_code=400,
             detail="Invalid filename"
         )
     
-    if not filename.endswith('.pdf'):
-        raise HTTPException(
-            status_code=400,
-            detail="Only PDF files can be deleted"
-        )
-    
-    file_path = os.path.join(REPORTS_DIR, filename)
+    file_path = REPORTS_DIR / filename
     
-    if not os.path.exists(file_path):
+    if not file_path.is_file():
         raise HTTPException(
             status_code=404,
             detail=f"Report '{filename}' not found"
@@ -231,6 +352,7 @@ async def delete_report(filename: str):
     
     try:
         os.remove(file_path)
+        _invalidate_list_cache()
         logger.info(f"🗑️  Deleted report: {filename}")
         
         return {
@@ -257,43 +379,32 @@ async def get_report_info(filename: str):
     Returns:
     - Metadata about the report
     """
-    # Security check
-    if '..' in filename or '/' in filename or '\\' in filename:
+    # Security check: plain "<name>.pdf", no path separators
+    if not _SAFE_PDF_NAME.fullmatch(filename):
         raise HTTPException(
             status_code=400,
             detail="Invalid filename"
         )
     
-    if not filename.endswith('.pdf'):
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid file type"
-        )
-    
-    file_path = os.path.join(REPORTS_DIR, filename)
+    file_path = REPORTS_DIR / filename
     
-    if not os.path.exists(file_path):
+    if not file_path.is_file():
         raise HTTPException(
             status_code=404,
             detail=f"Report '{filename}' not found"
         )
     
     try:
-        from datetime import datetime
-        
-        file_size = os.path.getsize(file_path)
-        modified_time = os.path.getmtime(file_path)
-        
-        # Parse artist name from filename
-        parts = filename.replace('.pdf', '').split('_Report_')
-        artist_name = parts[0].replace('_', ' ') if parts else 'Unknown'
+        st = os.stat(file_path)
+        file_size = st.st_size
+        modified_time = st.st_mtime
         
         return {
             "success": True,
             "filename": filename,
-            "artist_name": artist_name,
+            "artist_name": _artist_from_filename(filename),
             "download_url": f"/reports/download/{filename}",
-            "path": file_path,
+            "path": str(file_path),
             "size_bytes": file_size,
             "size_mb": round(file_size / (1024 * 1024), 2),
             "created_at": datetime.fromtimestamp(modified_time).isoformat()
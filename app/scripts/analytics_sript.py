@@ -1,8 +1,25 @@
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
+
+
+def emit(lines):
+    """Печатает блок строк одним write вместо print на каждую строку"""
+    sys.stdout.write(''.join(f"{line}\n" for line in lines))
+
 
 # Загрузить
-df = pd.read_pickle('/Users/nuraliserikbay/Desktop/codes/music_analyzer_agent/data/processed/all_believe_data.pkl')
+df = pd.read_parquet(
+    '/Users/nuraliserikbay/Desktop/codes/music_analyzer_agent/data/processed/all_believe_data.parquet',
+    # Только используемые колонки
+    columns=[
+        'Месяц отчета',
+        'Сумма вознаграждения',
+        'Количество',
+        'Исполнитель',
+        'Платформа',
+        'страна / регион'
+    ]
+)
 
 print("=" * 60)
 print("📊 DEEPER ANALYSIS")
@@ -20,7 +37,7 @@ print("\n📅 ДИНАМИКА ПО ГОДАМ:")
 print(yearly)
 
 # Рост year-over-year
-print("\n📈 РОСТ:")
+lines = ["\n📈 РОСТ:"]
 for year in range(2021, 2025):
     if year in yearly.index:
         rev = yearly.loc[year, 'Сумма вознаграждения']
@@ -30,15 +47,18 @@ for year in range(2021, 2025):
         if year > 2021 and year-1 in yearly.index:
             prev_rev = yearly.loc[year-1, 'Сумма вознаграждения']
             growth = ((rev - prev_rev) / prev_rev) * 100
-            print(f"{year}: €{rev:,.0f} ({growth:+.1f}% YoY) | {streams/1e6:.1f}M стримов | {artists} артистов")
+            lines.append(f"{year}: €{rev:,.0f} ({growth:+.1f}% YoY) | {streams/1e6:.1f}M стримов | {artists} артистов")
         else:
-            print(f"{year}: €{rev:,.0f} | {streams/1e6:.1f}M стримов | {artists} артистов")
+            lines.append(f"{year}: €{rev:,.0f} | {streams/1e6:.1f}M стримов | {artists} артистов")
+emit(lines)
 
 # 2. КОНЦЕНТРАЦИЯ ДОХОДОВ
 print("\n💰 КОНЦЕНТРАЦИЯ:")
-top_10_rev = df.groupby('Исполнитель')['Сумма вознаграждения'].sum().sort_values(ascending=False).head(10).sum()
-top_20_rev = df.groupby('Исполнитель')['Сумма вознаграждения'].sum().sort_values(ascending=False).head(20).sum()
-top_50_rev = df.groupby('Исполнитель')['Сумма вознаграждения'].sum().sort_values(ascending=False).head(50).sum()
+# Один groupby на все срезы
+artist_rev = df.groupby('Исполнитель', sort=False, observed=True)['Сумма вознаграждения'].sum().sort_values(ascending=False)
+top_10_rev = artist_rev.head(10).sum()
+top_20_rev = artist_rev.head(20).sum()
+top_50_rev = artist_rev.head(50).sum()
 total_rev = df['Сумма вознаграждения'].sum()
 
 print(f"Топ-10 артистов: €{top_10_rev:,.0f} ({top_10_rev/total_rev*100:.1f}%)")
@@ -47,25 +67,29 @@ print(f"Топ-50 артистов: €{top_50_rev:,.0f} ({top_50_rev/total_rev*
 
 # 3. ПЛАТФОРМЫ
 print("\n📱 ТОП-10 ПЛАТФОРМ:")
-platforms = df.groupby('Платформа')['Сумма вознаграждения'].sum().sort_values(ascending=False).head(10)
-for platform, rev in platforms.items():
-    pct = (rev / total_rev) * 100
-    print(f"   {platform}: €{rev:,.0f} ({pct:.1f}%)")
+# Выручка и стримы по платформам одним groupby (нужны и для CPM ниже)
+platform_totals = df.groupby('Платформа', sort=False, observed=True).agg(
+    rev=('Сумма вознаграждения', 'sum'),
+    streams=('Количество', 'sum')
+)
+platforms = platform_totals['rev'].sort_values(ascending=False).head(10)
+emit(f"   {platform}: €{rev:,.0f} ({rev / total_rev * 100:.1f}%)" for platform, rev in platforms.items())
 
 # 4. ГЕОГРАФИЯ
 print("\n🌍 ТОП-10 СТРАН:")
-countries = df.groupby('страна / регион')['Количество'].sum().sort_values(ascending=False).head(10)
+countries = df.groupby('страна / регион', sort=False, observed=True)['Количество'].sum().sort_values(ascending=False).head(10)
 total_streams = df['Количество'].sum()
-for country, streams in countries.items():
-    pct = (streams / total_streams) * 100
-    print(f"   {country}: {streams/1e6:.1f}M стримов ({pct:.1f}%)")
+emit(
+    f"   {country}: {streams/1e6:.1f}M стримов ({streams / total_streams * 100:.1f}%)"
+    for country, streams in countries.items()
+)
 
 # 5. CPM АНАЛИЗ
 print("\n💵 CPM ПО ПЛАТФОРМАМ (топ-10):")
-platform_cpm = df.groupby('Платформа').apply(
-    lambda x: (x['Сумма вознаграждения'].sum() / x['Количество'].sum() * 1000) if x['Количество'].sum() > 0 else 0
-).sort_values(ascending=False).head(10)
-for platform, cpm in platform_cpm.items():
-    print(f"   {platform}: €{cpm:.3f} за 1000 стримов")
+streams = platform_totals['streams']
+platform_cpm = (
+    platform_totals['rev'] / streams.where(streams > 0) * 1000
+).fillna(0).sort_values(ascending=False).head(10)
+emit(f"   {platform}: €{cpm:.3f} за 1000 стримов" for platform, cpm in platform_cpm.items())
 
 print("\n" + "=" * 60)
\ No newline at end of file
@@ -6,7 +6,21 @@ warnings.filterwarnings('ignore')
 
 # Загрузить данные
 print("📥 Загрузка данных...")
-df = pd.read_pickle('/Users/nuraliserikbay/Desktop/codes/music_analyzer_agent/data/processed/all_believe_data.pkl')
+df = pd.read_parquet(
+    '/Users/nuraliserikbay/Desktop/codes/music_analyzer_agent/data/processed/all_believe_data.parquet',
+    # Только используемые колонки
+    columns=[
+        'Месяц отчета',
+        'Сумма вознаграждения',
+        'Количество',
+        'Исполнитель',
+        'Название трека',
+        'Платформа',
+        'страна / регион',
+        'Тип продажи',
+        'Лейбл'
+    ]
+)
 
 # Подготовка
 df['year'] = df['Месяц отчета'].dt.year
@@ -28,7 +42,7 @@ print("\n" + "=" * 80)
 print("🏆 ТОП-20 ТРЕКОВ ПО ВЫРУЧКЕ")
 print("=" * 80)
 
-top_tracks = df.groupby(['Исполнитель', 'Название трека']).agg({
+top_tracks = df.groupby(['Исполнитель', 'Название трека'], observed=True).agg({
     'Сумма вознаграждения': 'sum',
     'Количество': 'sum'
 }).reset_index()
@@ -47,7 +61,7 @@ print("\n" + "=" * 80)
 print("🔥 ТОП-20 ТРЕКОВ ПО СТРИМАМ (VIRAL ХИТЫ)")
 print("=" * 80)
 
-viral_tracks = df.groupby(['Исполнитель', 'Название трека']).agg({
+viral_tracks = df.groupby(['Исполнитель', 'Название трека'], observed=True).agg({
     'Количество': 'sum',
     'Сумма вознаграждения': 'sum'
 }).reset_index()
@@ -98,7 +112,7 @@ print("\n" + "=" * 80)
 print("🌍 ГЕОГРАФИЧЕСКИЙ АНАЛИЗ")
 print("=" * 80)
 
-countries = df.groupby('страна / регион').agg({
+countries = df.groupby('страна / регион', observed=True).agg({
     'Сумма вознаграждения': 'sum',
     'Количество': 'sum'
 }).reset_index()
@@ -124,8 +138,8 @@ print("📈 РОСТ АРТИСТОВ (YoY)")
 print("=" * 80)
 
 # Сравнение 2023 vs 2024
-artists_2023 = df[df['year'] == 2023].groupby('Исполнитель')['Сумма вознаграждения'].sum()
-artists_2024 = df[df['year'] == 2024].groupby('Исполнитель')['Сумма вознаграждения'].sum()
+artists_2023 = df[df['year'] == 2023].groupby('Исполнитель', observed=True)['Сумма вознаграждения'].sum()
+artists_2024 = df[df['year'] == 2024].groupby('Исполнитель', observed=True)['Сумма вознаграждения'].sum()
 
 growth_df = pd.DataFrame({
     '2023': artists_2023,
@@ -155,7 +169,7 @@ print("\n" + "=" * 80)
 print("🎤 ДИВЕРСИФИКАЦИЯ АРТИСТОВ")
 print("=" * 80)
 
-artist_diversity = df.groupby('Исполнитель').agg({
+artist_diversity = df.groupby('Исполнитель', observed=True).agg({
     'Платформа': 'nunique',
     'страна / регион': 'nunique',
     'Название трека': 'nunique',
@@ -177,7 +191,7 @@ print("\n" + "=" * 80)
 print("📱 ДИНАМИКА ПЛАТФОРМ")
 print("=" * 80)
 
-platforms_yearly = df.groupby(['Платформа', 'year'])['Сумма вознаграждения'].sum().reset_index()
+platforms_yearly = df.groupby(['Платформа', 'year'], observed=True)['Сумма вознаграждения'].sum().reset_index()
 platforms_pivot = platforms_yearly.pivot(index='Платформа', columns='year', values='Сумма вознаграждения').fillna(0)
 
 # Рост 2023→2024
@@ -242,7 +256,7 @@ print("\n" + "=" * 80)
 print("⏳ ЖИЗНЕННЫЙ ЦИКЛ ТРЕКОВ")
 print("=" * 80)
 
-track_lifecycle = df.groupby(['Исполнитель', 'Название трека']).agg({
+track_lifecycle = df.groupby(['Исполнитель', 'Название трека'], observed=True).agg({
     'year_month': ['min', 'max', 'nunique'],
     'Сумма вознаграждения': 'sum',
     'Количество': 'sum'
@@ -270,7 +284,7 @@ print("\n" + "=" * 80)
 print("🎯 КОНЦЕНТРАЦИЯ ВЫРУЧКИ ПО ТРЕКАМ")
 print("=" * 80)
 
-track_revenue = df.groupby(['Исполнитель', 'Название трека'])['Сумма вознаграждения'].sum().sort_values(ascending=False)
+track_revenue = df.groupby(['Исполнитель', 'Название трека'], observed=True)['Сумма вознаграждения'].sum().sort_values(ascending=False)
 top_10_tracks = track_revenue.head(10).sum()
 top_50_tracks = track_revenue.head(50).sum()
 top_100_tracks = track_revenue.head(100).sum()
@@ -1,22 +1,64 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import sys
 import warnings
+from pandas.api.types import CategoricalDtype
 warnings.filterwarnings('ignore')
 
 print("📥 Загрузка данных...")
-df = pd.read_pickle('/Users/nuraliserikbay/Desktop/codes/music_analyzer_agent/data/processed/all_believe_data.pkl')
+df = pd.read_parquet(
+    '/Users/nuraliserikbay/Desktop/codes/music_analyzer_agent/data/processed/all_believe_data.parquet',
+    # Только используемые колонки
+    columns=[
+        'Месяц отчета',
+        'Сумма вознаграждения',
+        'Количество',
+        'Исполнитель',
+        'Название трека',
+        'Платформа',
+        'страна / регион'
+    ]
+)
 
 # Подготовка
-df['year'] = df['Месяц отчета'].dt.year
+# Ключи groupby — категории (int-коды вместо хеширования строк); для parquet
+# из merging_believe_analytics это уже так, astype тогда ничего не копирует
+for col in ['Исполнитель', 'Платформа']:
+    df[col] = df[col].astype('category')
+# Nullable Int16: строки с NaT в дате (to_datetime(errors='coerce') при слиянии) дают <NA>
+df['year'] = df['Месяц отчета'].dt.year.astype('Int16')
 df['month'] = df['Месяц отчета'].dt.month
 df['year_month'] = df['Месяц отчета'].dt.to_period('M')
-df['release_date'] = df.groupby(['Исполнитель', 'Название трека'])['Месяц отчета'].transform('min')
-df['track_age_months'] = ((df['Месяц отчета'] - df['release_date']).dt.days / 30).round(0)
 
 total_revenue = df['Сумма вознаграждения'].sum()
 total_streams = df['Количество'].sum()
 
+# Срезы по годам: маски считаются один раз для всех блоков ниже
+df_2023 = df[df['year'] == 2023]
+df_2024 = df[df['year'] == 2024]
+
+
+def emit(lines):
+    """Печатает блок строк одним write вместо print на каждую строку"""
+    sys.stdout.write(''.join(f"{line}\n" for line in lines))
+
+
+def codes_and_labels(column):
+    """Int-коды (-1 для пропусков) и отсортированные метки колонки"""
+    if isinstance(column.dtype, CategoricalDtype):
+        return column.cat.codes.to_numpy().astype(np.intp), np.asarray(column.cat.categories)
+    codes, labels = pd.factorize(column, sort=True)
+    return codes.astype(np.intp), np.asarray(labels)
+
+
+def isin_codes(column, values):
+    """isin по int-кодам категорий вместо хеширования строк (fallback на обычный isin)"""
+    if isinstance(column.dtype, CategoricalDtype):
+        codes = column.cat.categories.get_indexer(values)
+        return column.cat.codes.isin(codes[codes >= 0])
+    return column.isin(values)
+
 print("=" * 80)
 print("🎯 СТРАТЕГИЧЕСКИЙ АНАЛИЗ И МАТРИЦА РОСТА")
 print("=" * 80)
@@ -28,7 +70,7 @@ print("\n" + "=" * 80)
 print("💰 ARPU И ЭФФЕКТИВНОСТЬ АРТИСТОВ")
 print("=" * 80)
 
-artist_stats = df.groupby('Исполнитель').agg({
+artist_stats = df.groupby('Исполнитель', sort=False, observed=True).agg({
     'Сумма вознаграждения': 'sum',
     'Количество': 'sum',
     'Название трека': 'nunique',
@@ -46,16 +88,20 @@ artist_stats['Стримы_на_трек'] = artist_stats['Стримы'] / arti
 # Топ-20 по ARPU (выручка на трек)
 print("\n🏆 ТОП-20 АРТИСТОВ ПО ЭФФЕКТИВНОСТИ (ВЫРУЧКА НА ТРЕК):")
 top_arpu = artist_stats[artist_stats['Треков'] >= 3].sort_values('Выручка_на_трек', ascending=False).head(20)
-for _, row in top_arpu.iterrows():
-    print(f"{row['Артист']}")
-    print(f"   💰 €{row['Выручка_на_трек']:,.0f}/трек | 🎵 {row['Треков']} треков | Всего: €{row['Выручка']:,.0f}")
-    print(f"   📊 CPM: €{row['CPM']:.3f} | 🎧 {row['Стримы_на_трек']/1e6:.1f}M стримов/трек")
+emit(
+    f"{r.Артист}\n"
+    f"   💰 €{r.Выручка_на_трек:,.0f}/трек | 🎵 {r.Треков} треков | Всего: €{r.Выручка:,.0f}\n"
+    f"   📊 CPM: €{r.CPM:.3f} | 🎧 {r.Стримы_на_трек/1e6:.1f}M стримов/трек"
+    for r in top_arpu.itertuples(index=False)
+)
 
 # Активность
 print("\n📈 ТОП-20 ПО ЕЖЕМЕСЯЧНОЙ ВЫРУЧКЕ:")
 top_monthly = artist_stats.sort_values('Выручка_в_месяц', ascending=False).head(20)
-for _, row in top_monthly.iterrows():
-    print(f"{row['Артист']}: €{row['Выручка_в_месяц']:,.0f}/мес | {row['Активных_месяцев']} мес | Всего: €{row['Выручка']:,.0f}")
+emit(
+    f"{r.Артист}: €{r.Выручка_в_месяц:,.0f}/мес | {r.Активных_месяцев} мес | Всего: €{r.Выручка:,.0f}"
+    for r in top_monthly.itertuples(index=False)
+)
 
 # ============================================================================
 # 2. ВОЗРАСТ ТРЕКОВ И EVERGREEN VS VIRAL
@@ -65,35 +111,26 @@ print("⏳ АНАЛИЗ ВОЗРАСТА ТРЕКОВ")
 print("=" * 80)
 
 # Группировка по возрасту
-track_age_analysis = df.groupby(['Исполнитель', 'Название трека']).agg({
-    'release_date': 'first',
-    'Месяц отчета': 'max',
-    'Сумма вознаграждения': 'sum',
-    'Количество': 'sum',
-    'year_month': 'nunique'
+# Дата релиза = первый месяц отчета трека: считается в той же агрегации, без колонки на весь df
+track_age_analysis = df.groupby(['Исполнитель', 'Название трека'], observed=True).agg(**{
+    'release_date': ('Месяц отчета', 'min'),
+    'Месяц отчета': ('Месяц отчета', 'max'),
+    'Сумма вознаграждения': ('Сумма вознаграждения', 'sum'),
+    'Количество': ('Количество', 'sum'),
+    'year_month': ('year_month', 'nunique')
 }).reset_index()
 
 track_age_analysis['age_months'] = ((track_age_analysis['Месяц отчета'] - track_age_analysis['release_date']).dt.days / 30).round(0)
 track_age_analysis['revenue_per_month'] = track_age_analysis['Сумма вознаграждения'] / track_age_analysis['year_month']
 
-# Категории
-def categorize_track(row):
-    age = row['age_months']
-    rpm = row['revenue_per_month']
-    
-    if age <= 6:
-        return 'Новый релиз'
-    elif age <= 12:
-        return 'Молодой'
-    elif age <= 24:
-        return 'Зрелый'
-    else:
-        if rpm > 100:
-            return 'Evergreen'
-        else:
-            return 'Старый'
-
-track_age_analysis['Категория'] = track_age_analysis.apply(categorize_track, axis=1)
+# Категории (векторно: условия проверяются по порядку, как в цепочке if/elif)
+age = track_age_analysis['age_months'].to_numpy()
+rpm = track_age_analysis['revenue_per_month'].to_numpy()
+track_age_analysis['Категория'] = np.select(
+    [age <= 6, age <= 12, age <= 24, rpm > 100],
+    ['Новый релиз', 'Молодой', 'Зрелый', 'Evergreen'],
+    default='Старый'
+)
 
 print("\n📊 РАСПРЕДЕЛЕНИЕ ТРЕКОВ ПО ВОЗРАСТУ:")
 category_stats = track_age_analysis.groupby('Категория').agg({
@@ -103,15 +140,20 @@ category_stats = track_age_analysis.groupby('Категория').agg({
 }).reset_index()
 category_stats.columns = ['Категория', 'Треков', 'Выручка', 'Средняя_выручка_в_месяц']
 
-for _, row in category_stats.iterrows():
-    pct = (row['Выручка'] / total_revenue) * 100
-    print(f"{row['Категория']}: {row['Треков']} треков | €{row['Выручка']:,.0f} ({pct:.1f}%) | €{row['Средняя_выручка_в_месяц']:.0f}/мес")
+emit(
+    f"{r.Категория}: {r.Треков} треков | €{r.Выручка:,.0f} ({r.Выручка / total_revenue * 100:.1f}%) | €{r.Средняя_выручка_в_месяц:.0f}/мес"
+    for r in category_stats.itertuples(index=False)
+)
 
 print("\n🌟 ТОП-15 EVERGREEN ТРЕКОВ:")
 evergreen = track_age_analysis[track_age_analysis['Категория'] == 'Evergreen'].sort_values('Сумма вознаграждения', ascending=False).head(15)
-for _, row in evergreen.iterrows():
-    print(f"{row['Исполнитель']} - {row['Название трека']}")
-    print(f"   💰 €{row['Сумма вознаграждения']:,.0f} | ⏱️  {row['age_months']:.0f} мес | €{row['revenue_per_month']:,.0f}/мес")
+emit(
+    f"{artist} - {track}\n"
+    f"   💰 €{revenue:,.0f} | ⏱️  {age:.0f} мес | €{rpm:,.0f}/мес"
+    for artist, track, revenue, age, rpm in evergreen[
+        ['Исполнитель', 'Название трека', 'Сумма вознаграждения', 'age_months', 'revenue_per_month']
+    ].itertuples(index=False, name=None)
+)
 
 # ============================================================================
 # 3. CPM ПО СТРАНЕ + ПЛАТФОРМА (ДЕТАЛИЗАЦИЯ)
@@ -121,25 +163,38 @@ print("🌍 CPM ПО СТРАНЕ × ПЛАТФОРМА")
 print("=" * 80)
 
 # Топ-10 стран и платформ
-top_countries = df.groupby('страна / регион')['Сумма вознаграждения'].sum().nlargest(10).index
-top_platforms = df.groupby('Платформа')['Сумма вознаграждения'].sum().nlargest(10).index
+# Выручка и стримы по платформам считаются один раз и переиспользуются ниже
+platform_totals = df.groupby('Платформа', sort=False, observed=True).agg(
+    rev=('Сумма вознаграждения', 'sum'),
+    streams=('Количество', 'sum')
+)
+platform_rev = platform_totals['rev']
+top_countries = df.groupby('страна / регион', sort=False, observed=True)['Сумма вознаграждения'].sum().nlargest(10).index
+top_platforms = platform_rev.nlargest(10).index
 
-country_platform_cpm = df[
-    (df['страна / регион'].isin(top_countries)) & 
-    (df['Платформа'].isin(top_platforms))
-].groupby(['страна / регион', 'Платформа']).agg({
+# Платформа × страна: одна агрегация по всему df, из нее берутся и топ-комбинации, и блок 4
+platform_country = df.groupby(['Платформа', 'страна / регион'], observed=True).agg({
     'Сумма вознаграждения': 'sum',
     'Количество': 'sum'
 }).reset_index()
 
+country_platform_cpm = platform_country[
+    platform_country['страна / регион'].isin(top_countries) & 
+    platform_country['Платформа'].isin(top_platforms)
+].copy()
+
 country_platform_cpm['CPM'] = (country_platform_cpm['Сумма вознаграждения'] / country_platform_cpm['Количество'] * 1000)
 country_platform_cpm = country_platform_cpm[country_platform_cpm['Количество'] > 10000]
 
 print("\n💎 ТОП-20 КОМБИНАЦИЙ СТРАНА×ПЛАТФОРМА ПО CPM:")
 top_combos = country_platform_cpm.sort_values('CPM', ascending=False).head(20)
-for _, row in top_combos.iterrows():
-    print(f"{row['страна / регион']} × {row['Платформа']}")
-    print(f"   💰 CPM: €{row['CPM']:.3f} | €{row['Сумма вознаграждения']:,.0f} | {row['Количество']/1e6:.1f}M стримов")
+emit(
+    f"{country} × {platform}\n"
+    f"   💰 CPM: €{cpm:.3f} | €{revenue:,.0f} | {streams/1e6:.1f}M стримов"
+    for country, platform, cpm, revenue, streams in top_combos[
+        ['страна / регион', 'Платформа', 'CPM', 'Сумма вознаграждения', 'Количество']
+    ].itertuples(index=False, name=None)
+)
 
 # ============================================================================
 # 4. ПОТЕНЦИАЛ НЕДОИСПОЛЬЗОВАННЫХ КАНАЛОВ
@@ -149,35 +204,37 @@ print("💎 ПОТЕНЦИАЛ НЕДОИСПОЛЬЗОВАННЫХ КАНАЛО
 print("=" * 80)
 
 # Низкий CPM, высокие стримы
-low_cpm_analysis = df.groupby(['Платформа', 'страна / регион']).agg({
-    'Сумма вознаграждения': 'sum',
-    'Количество': 'sum'
-}).reset_index()
+low_cpm_analysis = platform_country.copy()
 
 low_cpm_analysis['CPM'] = (low_cpm_analysis['Сумма вознаграждения'] / low_cpm_analysis['Количество'] * 1000)
 low_cpm_analysis = low_cpm_analysis[low_cpm_analysis['Количество'] > 1e6]  # Минимум 1M стримов
 
 # Средний CPM по платформе
-avg_platform_cpm = df.groupby('Платформа').apply(
-    lambda x: (x['Сумма вознаграждения'].sum() / x['Количество'].sum() * 1000) if x['Количество'].sum() > 0 else 0
-)
+platform_streams = platform_totals['streams']
+avg_platform_cpm = (platform_rev / platform_streams.where(platform_streams > 0) * 1000).fillna(0)
 
 print("\n⚠️ ТОП-20 УПУЩЕННЫХ ВОЗМОЖНОСТЕЙ (Высокие стримы, низкий CPM):")
+lines = []
 for platform in low_cpm_analysis['Платформа'].unique()[:10]:
     platform_data = low_cpm_analysis[low_cpm_analysis['Платформа'] == platform]
     avg_cpm = avg_platform_cpm.get(platform, 0)
     
-    for _, row in platform_data.nsmallest(3, 'CPM').iterrows():
-        if row['CPM'] < avg_cpm * 0.5:  # CPM ниже 50% от среднего
-            potential_revenue = (row['Количество'] / 1000) * avg_cpm
-            lost_revenue = potential_revenue - row['Сумма вознаграждения']
+    for country, cpm, revenue, streams in platform_data.nsmallest(3, 'CPM')[
+        ['страна / регион', 'CPM', 'Сумма вознаграждения', 'Количество']
+    ].itertuples(index=False, name=None):
+        if cpm < avg_cpm * 0.5:  # CPM ниже 50% от среднего
+            potential_revenue = (streams / 1000) * avg_cpm
+            lost_revenue = potential_revenue - revenue
             
             if lost_revenue > 500:  # Потенциал больше €500
-                print(f"{row['Платформа']} × {row['страна / регион']}")
-                print(f"   📊 Текущий CPM: €{row['CPM']:.3f} | Средний: €{avg_cpm:.3f}")
-                print(f"   💰 Текущая выручка: €{row['Сумма вознаграждения']:,.0f}")
-                print(f"   🎯 Потенциал: €{potential_revenue:,.0f} (+€{lost_revenue:,.0f})")
-                print(f"   🎧 Стримы: {row['Количество']/1e6:.1f}M")
+                lines.append(
+                    f"{platform} × {country}\n"
+                    f"   📊 Текущий CPM: €{cpm:.3f} | Средний: €{avg_cpm:.3f}\n"
+                    f"   💰 Текущая выручка: €{revenue:,.0f}\n"
+                    f"   🎯 Потенциал: €{potential_revenue:,.0f} (+€{lost_revenue:,.0f})\n"
+                    f"   🎧 Стримы: {streams/1e6:.1f}M"
+                )
+emit(lines)
 
 # ============================================================================
 # 5. МАТРИЦА РОСТА АРТИСТОВ (2023 vs 2024)
@@ -187,63 +244,70 @@ print("📊 МАТРИЦА РОСТА АРТИСТОВ")
 print("=" * 80)
 
 # Данные по годам
-artists_2023 = df[df['year'] == 2023].groupby('Исполнитель').agg({
+artists_2023 = df_2023.groupby('Исполнитель', observed=True).agg({
     'Сумма вознаграждения': 'sum',
     'Количество': 'sum'
 }).reset_index()
 artists_2023.columns = ['Артист', 'Выручка_2023', 'Стримы_2023']
 
-artists_2024 = df[df['year'] == 2024].groupby('Исполнитель').agg({
+artists_2024 = df_2024.groupby('Исполнитель', observed=True).agg({
     'Сумма вознаграждения': 'sum',
     'Количество': 'sum'
 }).reset_index()
 artists_2024.columns = ['Артист', 'Выручка_2024', 'Стримы_2024']
 
-growth_matrix = pd.merge(artists_2023, artists_2024, on='Артист', how='outer').fillna(0)
+# Нули только в числовых колонках: 'Артист' категориальный, fillna(0) по нему упал бы
+growth_matrix = pd.merge(artists_2023, artists_2024, on='Артист', how='outer').fillna(
+    {'Выручка_2023': 0, 'Стримы_2023': 0, 'Выручка_2024': 0, 'Стримы_2024': 0}
+)
 growth_matrix['Рост_выручки_%'] = ((growth_matrix['Выручка_2024'] - growth_matrix['Выручка_2023']) / growth_matrix['Выручка_2023'] * 100).replace([np.inf, -np.inf], 0)
 growth_matrix['Абс_рост'] = growth_matrix['Выручка_2024'] - growth_matrix['Выручка_2023']
 
-# Категоризация
-def categorize_artist(row):
-    rev_2023 = row['Выручка_2023']
-    rev_2024 = row['Выручка_2024']
-    growth = row['Рост_выручки_%']
-    
-    if rev_2023 == 0 and rev_2024 > 1000:
-        return '⭐ Новая звезда'
-    elif rev_2024 > 10000 and growth > 50:
-        return '🚀 Растущая звезда'
-    elif rev_2024 > 10000 and growth > 0:
-        return '💎 Стабильная звезда'
-    elif rev_2024 > 5000 and growth > 100:
-        return '🔥 Прорыв года'
-    elif rev_2024 > 1000 and growth > 0:
-        return '📈 Растущий'
-    elif rev_2024 > 1000 and growth < 0:
-        return '⚠️ Падающий'
-    elif rev_2024 < 1000 and rev_2023 > 1000:
-        return '📉 Потерянный'
-    else:
-        return '🌱 Начинающий'
-
-growth_matrix['Категория'] = growth_matrix.apply(categorize_artist, axis=1)
+# Категоризация (первое выполненное условие побеждает, как в цепочке if/elif)
+rev_2023 = growth_matrix['Выручка_2023'].to_numpy()
+rev_2024 = growth_matrix['Выручка_2024'].to_numpy()
+growth = growth_matrix['Рост_выручки_%'].to_numpy()
+growth_matrix['Категория'] = np.select(
+    [
+        (rev_2023 == 0) & (rev_2024 > 1000),
+        (rev_2024 > 10000) & (growth > 50),
+        (rev_2024 > 10000) & (growth > 0),
+        (rev_2024 > 5000) & (growth > 100),
+        (rev_2024 > 1000) & (growth > 0),
+        (rev_2024 > 1000) & (growth < 0),
+        (rev_2024 < 1000) & (rev_2023 > 1000),
+    ],
+    [
+        '⭐ Новая звезда',
+        '🚀 Растущая звезда',
+        '💎 Стабильная звезда',
+        '🔥 Прорыв года',
+        '📈 Растущий',
+        '⚠️ Падающий',
+        '📉 Потерянный',
+    ],
+    default='🌱 Начинающий'
+)
 
 print("\n📊 РАСПРЕДЕЛЕНИЕ АРТИСТОВ ПО КАТЕГОРИЯМ:")
 category_counts = growth_matrix['Категория'].value_counts()
-for cat, count in category_counts.items():
-    cat_revenue = growth_matrix[growth_matrix['Категория'] == cat]['Выручка_2024'].sum()
-    print(f"{cat}: {count} артистов | €{cat_revenue:,.0f} в 2024")
+category_revenue = growth_matrix.groupby('Категория')['Выручка_2024'].sum()
+emit(
+    f"{cat}: {count} артистов | €{category_revenue[cat]:,.0f} в 2024"
+    for cat, count in category_counts.items()
+)
 
 # Топ по категориям
 for category in ['🚀 Растущая звезда', '💎 Стабильная звезда', '🔥 Прорыв года', '⭐ Новая звезда']:
     if category in growth_matrix['Категория'].values:
-        print(f"\n{category}:")
         cat_artists = growth_matrix[growth_matrix['Категория'] == category].sort_values('Выручка_2024', ascending=False).head(10)
-        for _, row in cat_artists.iterrows():
-            if row['Выручка_2023'] > 0:
-                print(f"   {row['Артист']}: €{row['Выручка_2023']:,.0f} → €{row['Выручка_2024']:,.0f} ({row['Рост_выручки_%']:+.0f}%)")
-            else:
-                print(f"   {row['Артист']}: NEW → €{row['Выручка_2024']:,.0f}")
+        emit([f"\n{category}:"] + [
+            f"   {artist}: €{rev_2023:,.0f} → €{rev_2024:,.0f} ({growth:+.0f}%)" if rev_2023 > 0
+            else f"   {artist}: NEW → €{rev_2024:,.0f}"
+            for artist, rev_2023, rev_2024, growth in cat_artists[
+                ['Артист', 'Выручка_2023', 'Выручка_2024', 'Рост_выручки_%']
+            ].itertuples(index=False, name=None)
+        ])
 
 # ============================================================================
 # 6. МАТРИЦА ПЛАТФОРМ (РОСТ × ДОЛЯ)
@@ -252,46 +316,67 @@ print("\n" + "=" * 80)
 print("📱 МАТРИЦА ПЛАТФОРМ (РОСТ × ДОЛЯ)")
 print("=" * 80)
 
-platforms_2023 = df[df['year'] == 2023].groupby('Платформа')['Сумма вознаграждения'].sum()
-platforms_2024 = df[df['year'] == 2024].groupby('Платформа')['Сумма вознаграждения'].sum()
-
-platform_matrix = pd.DataFrame({
-    '2023': platforms_2023,
-    '2024': platforms_2024
-}).fillna(0)
+# Групповая сумма (платформа × год) через np.bincount по кодам категорий: один проход в C
+years_df = df[df['year'].between(2023, 2024)]
+platform_codes, platform_names = codes_and_labels(years_df['Платформа'])
+year_idx = years_df['year'].to_numpy(dtype=np.intp) - 2023
+values = years_df['Сумма вознаграждения'].to_numpy(dtype=np.float64)
+valid = (platform_codes >= 0) & ~np.isnan(values)  # как groupby: без пустых ключей, NaN не суммируются
+
+n_platforms = len(platform_names)
+sums = np.bincount(
+    platform_codes[valid] * 2 + year_idx[valid],
+    weights=values[valid],
+    minlength=n_platforms * 2
+).reshape(n_platforms, 2)
+present = np.bincount(platform_codes[platform_codes >= 0], minlength=n_platforms) > 0
+
+platform_matrix = pd.DataFrame(
+    sums[present],
+    index=pd.Index(platform_names[present], name='Платформа'),
+    columns=['2023', '2024']
+)
 
-platform_matrix['Рост_%'] = ((platform_matrix['2024'] - platform_matrix['2023']) / platform_matrix['2023'] * 100).replace([np.inf, -np.inf], 0)
+rev_2023 = platform_matrix['2023'].to_numpy()
+rev_2024 = platform_matrix['2024'].to_numpy()
+platform_matrix['Рост_%'] = np.where(rev_2023 != 0, (rev_2024 - rev_2023) / rev_2023 * 100, 0)
 platform_matrix['Доля_2024_%'] = (platform_matrix['2024'] / platform_matrix['2024'].sum() * 100)
 
 # Категоризация
-def categorize_platform(row):
-    growth = row['Рост_%']
-    share = row['Доля_2024_%']
-    
-    if share > 10 and growth > 20:
-        return '🌟 Лидер роста'
-    elif share > 10 and growth > 0:
-        return '💪 Стабильный лидер'
-    elif share > 10 and growth < 0:
-        return '⚠️ Падающий лидер'
-    elif share < 10 and growth > 50:
-        return '🚀 Восходящая'
-    elif share < 10 and growth > 0:
-        return '📈 Растущая ниша'
-    else:
-        return '📉 Падающая'
-
-platform_matrix['Категория'] = platform_matrix.apply(categorize_platform, axis=1)
+growth = platform_matrix['Рост_%'].to_numpy()
+share = platform_matrix['Доля_2024_%'].to_numpy()
+platform_matrix['Категория'] = pd.Categorical(np.select(
+    [
+        (share > 10) & (growth > 20),
+        (share > 10) & (growth > 0),
+        (share > 10) & (growth < 0),
+        (share < 10) & (growth > 50),
+        (share < 10) & (growth > 0),
+    ],
+    [
+        '🌟 Лидер роста',
+        '💪 Стабильный лидер',
+        '⚠️ Падающий лидер',
+        '🚀 Восходящая',
+        '📈 Растущая ниша',
+    ],
+    default='📉 Падающая'
+))
 
 print("\n📊 КАТЕГОРИИ ПЛАТФОРМ:")
+# Одна сортировка и один groupby вместо фильтра по каждой категории (порядок внутри групп сохраняется)
+platform_groups = dict(iter(
+    platform_matrix.sort_values('2024', ascending=False).groupby('Категория', sort=False, observed=True)
+))
 for category in platform_matrix['Категория'].unique():
-    print(f"\n{category}:")
-    cat_platforms = platform_matrix[platform_matrix['Категория'] == category].sort_values('2024', ascending=False)
-    for platform, row in cat_platforms.iterrows():
-        if row['2023'] > 0:
-            print(f"   {platform}: €{row['2023']:,.0f} → €{row['2024']:,.0f} ({row['Рост_%']:+.0f}%) | Доля: {row['Доля_2024_%']:.1f}%")
-        else:
-            print(f"   {platform}: NEW → €{row['2024']:,.0f} | Доля: {row['Доля_2024_%']:.1f}%")
+    cat_platforms = platform_groups[category]
+    emit([f"\n{category}:"] + [
+        f"   {platform}: €{rev_2023:,.0f} → €{rev_2024:,.0f} ({growth:+.0f}%) | Доля: {share:.1f}%" if rev_2023 > 0
+        else f"   {platform}: NEW → €{rev_2024:,.0f} | Доля: {share:.1f}%"
+        for platform, rev_2023, rev_2024, growth, share in cat_platforms[
+            ['2023', '2024', 'Рост_%', 'Доля_2024_%']
+        ].itertuples(index=True, name=None)
+    ])
 
 # ============================================================================
 # 7. ЗАВИСИМОСТЬ АРТИСТОВ ОТ ПЛАТФОРМ
@@ -300,17 +385,26 @@ print("\n" + "=" * 80)
 print("🎯 ЗАВИСИМОСТЬ ТОП-АРТИСТОВ ОТ ПЛАТФОРМ")
 print("=" * 80)
 
-top_artists = df.groupby('Исполнитель')['Сумма вознаграждения'].sum().nlargest(15).index
+# Выручка артистов уже посчитана в artist_stats
+top_artists = artist_stats.nlargest(15, 'Выручка')['Артист']
+
+# Один проход: артист × платформа только по строкам топ-артистов
+top_artist_platforms = df[isin_codes(df['Исполнитель'], top_artists)].groupby(
+    ['Исполнитель', 'Платформа'], sort=False, observed=True
+)['Сумма вознаграждения'].sum()
 
 for artist in top_artists:
-    artist_data = df[df['Исполнитель'] == artist]
-    platform_dist = artist_data.groupby('Платформа')['Сумма вознаграждения'].sum().sort_values(ascending=False)
+    platform_dist = top_artist_platforms.loc[artist]
     total_artist_rev = platform_dist.sum()
     
-    print(f"\n{artist} (€{total_artist_rev:,.0f}):")
-    for platform, rev in platform_dist.head(5).items():
-        pct = (rev / total_artist_rev) * 100
-        print(f"   {platform}: €{rev:,.0f} ({pct:.1f}%)")
+    # Только топ-5 платформ: частичный отбор вместо полной сортировки; доли одним векторным делением
+    top5 = platform_dist.nlargest(5)
+    top5_rev = top5.to_numpy()
+    top5_pct = top5_rev / total_artist_rev * 100
+    emit([f"\n{artist} (€{total_artist_rev:,.0f}):"] + [
+        f"   {platform}: €{rev:,.0f} ({pct:.1f}%)"
+        for platform, rev, pct in zip(top5.index.to_numpy(), top5_rev, top5_pct)
+    ])
 
 print("\n" + "=" * 80)
 print("✅ СТРАТЕГИЧЕСКИЙ АНАЛИЗ ЗАВЕРШЕН")
@@ -2,48 +2,71 @@
 """
 Скрипт для проверки заработка Darkhan Juzz в 2023-2024
 """
+import orjson
 import requests
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 
 # Конфигурация
 UUID = "b5222ce6-03c5-4959-ac9e-a3898ebfe075"
 DB_ENDPOINT = "http://localhost:3001"
 
-def execute_query(query, description=""):
+# Одна сессия на все запросы: соединения к DB_ENDPOINT переиспользуются (в т.ч. из потоков)
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+
+def execute_query(query):
     """Выполнить SQL запрос"""
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{DB_ENDPOINT}/execute-query",
-            json={"uuid": UUID, "query": query}
+            json={"uuid": UUID, "query": query},
+            timeout=30
         )
         response.raise_for_status()
-        results = response.json()['results']
-        
-        if description:
-            print(f"\n{'='*80}")
-            print(f"📊 {description}")
-            print(f"{'='*80}")
-            print(f"SQL: {query[:100]}...")
-            print(f"Результатов: {len(results)}")
-        
-        return results
+        return orjson.loads(response.content)['results']
     except Exception as e:
         print(f"❌ Ошибка: {e}")
         return None
 
+
+def sql_literal(value):
+    """Строковый литерал SQL с экранированием кавычек"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def print_header(query, results, description):
+    """Заголовок блока с запросом и числом результатов"""
+    print(f"\n{'='*80}")
+    print(f"📊 {description}")
+    print(f"{'='*80}")
+    print(f"SQL: {query[:100]}...")
+    print(f"Результатов: {len(results) if results is not None else 0}")
+
+
 print("="*80)
 print("🔍 ПРОВЕРКА ЗАРАБОТКА DARKHAN JUZZ (2023-2024)")
 print("="*80)
 
+# Сумма как число: пустые строки и NULL -> NULL (SUM/COUNT их пропускают)
+reward = "CAST(NULLIF(`Сумма вознаграждения`, '') AS REAL)"
+
 # 1. Используем точное имя артиста
 print("\n1️⃣ Проверяем наличие артиста 'Darkhan Juzz'...")
 artist_name = "Darkhan Juzz"
+# /execute-query принимает только текст SQL: значения подставляются экранированными литералами
+artist_sql = sql_literal(artist_name)
+# Период 2023-2024: [начало, конец)
+period_start, period_end = sql_literal('2023-01-01'), sql_literal('2025-01-01')
 
 query1 = f"""
 SELECT COUNT(*) as count
 FROM `csv_data`
-WHERE `Исполнитель` = '{artist_name}'
+WHERE `Исполнитель` = {artist_sql}
 """
 check = execute_query(query1)
 if check and check[0] and check[0][0] > 0:
@@ -52,16 +75,84 @@ else:
     print(f"   ❌ Артист '{artist_name}' не найден!")
     sys.exit(1)
 
-# 2. Проверяем диапазон дат в данных
-print("\n2️⃣ Проверяем диапазон дат для этого артиста...")
+# Остальные проверки независимы: отправляем их параллельно, печатаем по порядку
 query2 = f"""
 SELECT 
     MIN(`Месяц отчета`) as min_date,
     MAX(`Месяц отчета`) as max_date
 FROM `csv_data`
-WHERE `Исполнитель` = '{artist_name}'
+WHERE `Исполнитель` = {artist_sql}
+"""
+
+query3 = f"""
+SELECT 
+    SUM({reward}) as total_earnings
+FROM `csv_data`
+WHERE `Исполнитель` = {artist_sql}
+    AND {reward} IS NOT NULL
+    AND `Месяц отчета` >= {period_start}
+    AND `Месяц отчета` < {period_end}
+"""
+
+query4 = f"""
+SELECT 
+    strftime('%Y', `Месяц отчета`) as year,
+    SUM({reward}) as yearly_earnings,
+    COUNT({reward}) as transactions
+FROM `csv_data`
+WHERE `Исполнитель` = {artist_sql}
+    AND {reward} IS NOT NULL
+    AND `Месяц отчета` >= {period_start}
+    AND `Месяц отчета` < {period_end}
+GROUP BY year
+ORDER BY year
+"""
+
+query5 = f"""
+SELECT 
+    `Платформа`,
+    SUM({reward}) as platform_earnings,
+    COUNT({reward}) as transactions
+FROM `csv_data`
+WHERE `Исполнитель` = {artist_sql}
+    AND {reward} IS NOT NULL
+    AND `Месяц отчета` >= {period_start}
+    AND `Месяц отчета` < {period_end}
+GROUP BY `Платформа`
+ORDER BY platform_earnings DESC
+LIMIT 10
+"""
+
+query6 = f"""
+SELECT 
+    `Месяц отчета`,
+    SUM({reward}) as monthly_earnings
+FROM `csv_data`
+WHERE `Исполнитель` = {artist_sql}
+    AND {reward} IS NOT NULL
+    AND `Месяц отчета` >= {period_start}
+    AND `Месяц отчета` < {period_end}
+GROUP BY `Месяц отчета`
+ORDER BY monthly_earnings DESC
+LIMIT 10
 """
-date_range = execute_query(query2)
+
+ai_query = f"""
+SELECT SUM(CAST(`Сумма вознаграждения` AS REAL)) 
+FROM `csv_data` 
+WHERE `Исполнитель` = '{artist_name}' 
+    AND `Месяц отчета` >= '2023-01-01' 
+    AND `Месяц отчета` < '2025-01-01' 
+    AND `Сумма вознаграждения` IS NOT NULL 
+    AND `Сумма вознаграждения` != ""
+"""
+
+queries = [query2, query3, query4, query5, query6, ai_query]
+with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+    date_range, total, yearly, platforms, months, ai_result = executor.map(execute_query, queries)
+
+# 2. Проверяем диапазон дат в данных
+print("\n2️⃣ Проверяем диапазон дат для этого артиста...")
 if date_range and date_range[0]:
     min_date, max_date = date_range[0]
     print(f"   Данные доступны с {min_date} по {max_date}")
@@ -70,17 +161,7 @@ else:
 
 # 3. Считаем общий заработок за 2023-2024
 print("\n3️⃣ Считаем общий заработок за 2023-2024...")
-query3 = f"""
-SELECT 
-    SUM(CAST(`Сумма вознаграждения` AS REAL)) as total_earnings
-FROM `csv_data`
-WHERE `Исполнитель` = '{artist_name}'
-    AND `Сумма вознаграждения` IS NOT NULL
-    AND `Сумма вознаграждения` != ""
-    AND `Месяц отчета` >= '2023-01-01'
-    AND `Месяц отчета` < '2025-01-01'
-"""
-total = execute_query(query3, "Общий заработок 2023-2024")
+print_header(query3, total, "Общий заработок 2023-2024")
 if total and total[0] and total[0][0]:
     total_earnings = float(total[0][0])
     print(f"\n   💰 ИТОГО: {total_earnings:,.2f} EUR")
@@ -102,21 +183,6 @@ else:
 
 # 4. Разбивка по годам
 print("\n4️⃣ Разбивка по годам...")
-query4 = f"""
-SELECT 
-    strftime('%Y', `Месяц отчета`) as year,
-    SUM(CAST(`Сумма вознаграждения` AS REAL)) as yearly_earnings,
-    COUNT(*) as transactions
-FROM `csv_data`
-WHERE `Исполнитель` = '{artist_name}'
-    AND `Сумма вознаграждения` IS NOT NULL
-    AND `Сумма вознаграждения` != ""
-    AND `Месяц отчета` >= '2023-01-01'
-    AND `Месяц отчета` < '2025-01-01'
-GROUP BY year
-ORDER BY year
-"""
-yearly = execute_query(query4)
 if yearly:
     print(f"\n   {'Год':<10} {'Заработок (EUR)':>20} {'Транзакций':>15}")
     print(f"   {'-'*10} {'-'*20} {'-'*15}")
@@ -125,22 +191,6 @@ if yearly:
 
 # 5. Разбивка по платформам
 print("\n5️⃣ Разбивка по платформам за 2023-2024...")
-query5 = f"""
-SELECT 
-    `Платформа`,
-    SUM(CAST(`Сумма вознаграждения` AS REAL)) as platform_earnings,
-    COUNT(*) as transactions
-FROM `csv_data`
-WHERE `Исполнитель` = '{artist_name}'
-    AND `Сумма вознаграждения` IS NOT NULL
-    AND `Сумма вознаграждения` != ""
-    AND `Месяц отчета` >= '2023-01-01'
-    AND `Месяц отчета` < '2025-01-01'
-GROUP BY `Платформа`
-ORDER BY platform_earnings DESC
-LIMIT 10
-"""
-platforms = execute_query(query5)
 if platforms:
     print(f"\n   {'Платформа':<30} {'Заработок (EUR)':>20} {'Транзакций':>15}")
     print(f"   {'-'*30} {'-'*20} {'-'*15}")
@@ -149,21 +199,6 @@ if platforms:
 
 # 6. Разбивка по месяцам (топ-10)
 print("\n6️⃣ Топ-10 месяцев по заработку...")
-query6 = f"""
-SELECT 
-    `Месяц отчета`,
-    SUM(CAST(`Сумма вознаграждения` AS REAL)) as monthly_earnings
-FROM `csv_data`
-WHERE `Исполнитель` = '{artist_name}'
-    AND `Сумма вознаграждения` IS NOT NULL
-    AND `Сумма вознаграждения` != ""
-    AND `Месяц отчета` >= '2023-01-01'
-    AND `Месяц отчета` < '2025-01-01'
-GROUP BY `Месяц отчета`
-ORDER BY monthly_earnings DESC
-LIMIT 10
-"""
-months = execute_query(query6)
 if months:
     print(f"\n   {'Месяц':<15} {'Заработок (EUR)':>20}")
     print(f"   {'-'*15} {'-'*20}")
@@ -172,16 +207,7 @@ if months:
 
 # 7. Проверка SQL запроса который сгенерировал AI
 print("\n7️⃣ Проверяем SQL который сгенерировал AI...")
-ai_query = f"""
-SELECT SUM(CAST(`Сумма вознаграждения` AS REAL)) 
-FROM `csv_data` 
-WHERE `Исполнитель` = '{artist_name}' 
-    AND `Месяц отчета` >= '2023-01-01' 
-    AND `Месяц отчета` < '2025-01-01' 
-    AND `Сумма вознаграждения` IS NOT NULL 
-    AND `Сумма вознаграждения` != ""
-"""
-ai_result = execute_query(ai_query, "SQL от AI")
+print_header(ai_query, ai_result, "SQL от AI")
 if ai_result and ai_result[0] and ai_result[0][0]:
     ai_calculated = float(ai_result[0][0])
     print(f"\n   💰 Результат AI SQL: {ai_calculated:,.2f} EUR")
@@ -2,36 +2,63 @@
 """
 Скрипт для проверки количества стримов у треков Darkhan Juzz
 """
+import orjson
 import requests
-import json
+from requests.adapters import HTTPAdapter
 
 # UUID вашей базы данных
 UUID = "b5222ce6-03c5-4959-ac9e-a3898ebfe075"
 DB_ENDPOINT = "http://localhost:3001"
 
+# Одна keep-alive сессия на все запросы скрипта (без нового TCP на каждый вызов)
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 def execute_query(query):
     """Выполнить SQL запрос"""
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{DB_ENDPOINT}/execute-query",
-            json={"uuid": UUID, "query": query}
+            json={"uuid": UUID, "query": query},
+            timeout=30
         )
         response.raise_for_status()
-        return response.json()['results']
+        return orjson.loads(response.content)['results']
     except Exception as e:
         print(f"❌ Ошибка: {e}")
         return None
 
+def sql_literal(value):
+    """Строковый литерал SQL с экранированием кавычек"""
+    return "'" + str(value).replace("'", "''") + "'"
+
 print("=" * 80)
 print("🔍 ПРОВЕРКА ДАННЫХ ПО DARKHAN JUZZ")
 print("=" * 80)
 
+# Количество как число: пустые строки и NULL -> NULL (SUM их пропускает)
+streams_col = "CAST(NULLIF(`Количество`, '') AS REAL)"
+
+# LIKE '%...%' не использует индекс: один проход на поиск написаний,
+# дальше только точное сравнение по найденным именам
+query_artists = """
+SELECT DISTINCT `Исполнитель`
+FROM `csv_data`
+WHERE `Исполнитель` LIKE '%Darkhan%'
+"""
+artists = execute_query(query_artists) or []
+if not artists:
+    print("   ❌ Исполнитель Darkhan не найден")
+    raise SystemExit(1)
+artist_filter = f"`Исполнитель` IN ({', '.join(sql_literal(a[0]) for a in artists)})"
+
 # 1. Найти все треки Darkhan Juzz
 print("\n1️⃣ Ищем все треки исполнителя Darkhan Juzz...")
-query1 = """
+query1 = f"""
 SELECT DISTINCT `Название трека`
 FROM `csv_data`
-WHERE `Исполнитель` LIKE '%Darkhan%'
+WHERE {artist_filter}
 """
 tracks = execute_query(query1)
 if tracks:
@@ -43,14 +70,13 @@ else:
 
 # 2. Подсчитать стримы для каждого трека
 print("\n2️⃣ Подсчитываем стримы для каждого трека...")
-query2 = """
+query2 = f"""
 SELECT 
     `Название трека`, 
-    SUM(CAST(`Количество` AS REAL)) as total_streams
+    SUM({streams_col}) as total_streams
 FROM `csv_data`
-WHERE `Исполнитель` LIKE '%Darkhan%'
-    AND `Количество` IS NOT NULL 
-    AND `Количество` != ""
+WHERE {artist_filter}
+    AND {streams_col} IS NOT NULL
 GROUP BY `Название трека`
 ORDER BY total_streams DESC
 """
@@ -72,12 +98,11 @@ for track in tracks_to_check:
     query3 = f"""
     SELECT 
         `Название трека`,
-        SUM(CAST(`Количество` AS REAL)) as total_streams
+        SUM({streams_col}) as total_streams
     FROM `csv_data`
-    WHERE `Исполнитель` LIKE '%Darkhan%'
-        AND `Название трека` = '{track}'
-        AND `Количество` IS NOT NULL 
-        AND `Количество` != ""
+    WHERE {artist_filter}
+        AND `Название трека` = {sql_literal(track)}
+        AND {streams_col} IS NOT NULL
     GROUP BY `Название трека`
     """
     result = execute_query(query3)
@@ -89,12 +114,7 @@ for track in tracks_to_check:
 
 # 4. Проверить точное написание исполнителя
 print("\n4️⃣ Проверяем точное написание исполнителя...")
-query4 = """
-SELECT DISTINCT `Исполнитель`
-FROM `csv_data`
-WHERE `Исполнитель` LIKE '%Darkhan%'
-"""
-artists = execute_query(query4)
+# Уже получено при поиске написаний в начале
 if artists:
     print(f"   Найдено вариантов написания: {len(artists)}")
     for artist in artists:
@@ -7,10 +7,12 @@ import pandas as pd
 import numpy as np
 import sqlite3
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import warnings
 import os
 import subprocess
+import threading
+import orjson
 
 warnings.filterwarnings('ignore')
 
@@ -22,8 +24,8 @@ class AnalyticsService:
     RAM usage: ~50MB instead of 1.5GB
     """
     _instance = None
-    _conn = None
     _initialized = False
+    _rollups: Dict[str, Any] = {}
     
     def __new__(cls, db_path: str = None):
         """Singleton pattern - only one instance with database connection"""
@@ -44,11 +46,21 @@ class AnalyticsService:
         
         self.db_path = db_path
         self._init_database()
+        
+        # Optional columnar engine: DuckDB over a Parquet copy of the table
+        self.engine = os.getenv("ANALYTICS_ENGINE", "sqlite").lower()
+        self._duck = None
+        if self.engine == "duckdb":
+            try:
+                self._init_duckdb()
+            except Exception as e:
+                print(f"⚠️  DuckDB engine unavailable ({e}), falling back to SQLite")
+                self.engine = "sqlite"
         self._initialized = True
         
         # Get row count
         row_count = self._execute_query("SELECT COUNT(*) as count FROM analytics")[0]['count']
-        print(f"✅ AnalyticsService initialized with {row_count:,} rows (SQLite mode)")
+        print(f"✅ AnalyticsService initialized with {row_count:,} rows ({self.engine} mode)")
     
     def _init_database(self):
         """Initialize database connection and create DB if needed"""
@@ -71,19 +83,62 @@ class AnalyticsService:
             except Exception as e:
                 raise Exception(f"Failed to create database: {e}")
         
-        # Connect to database
-        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self._conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        # One connection per thread: queries run in a thread pool,
+        # and a single sqlite3 connection must not be shared by concurrent cursors
+        self._local = threading.local()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new database connection tuned for reads"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
         
         # Optimize SQLite for read performance
-        self._conn.execute('PRAGMA journal_mode=WAL')
-        self._conn.execute('PRAGMA synchronous=NORMAL')
-        self._conn.execute('PRAGMA cache_size=10000')
-        self._conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=10000')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+    
+    def _init_duckdb(self):
+        """
+        Open DuckDB over a Parquet copy of the analytics table.
+        The Parquet file is (re)built from SQLite when missing or older than the database.
+        """
+        import duckdb
+        
+        parquet_path = os.path.splitext(self.db_path)[0] + '.parquet'
+        if not os.path.exists(parquet_path) or os.path.getmtime(parquet_path) < os.path.getmtime(self.db_path):
+            self._export_parquet(duckdb, parquet_path)
+        
+        self._duck = duckdb.connect()
+        self._duck.execute(f"CREATE VIEW analytics AS SELECT * FROM read_parquet('{parquet_path}')")
+    
+    def _export_parquet(self, duckdb, parquet_path: str):
+        """Copy the SQLite table to Parquet, sorted by (year, month, artist) for scan pruning"""
+        print(f"🔧 Exporting analytics table to Parquet: {parquet_path}")
+        tmp_path = parquet_path + '.tmp'
+        sqlite_conn = self._connect()
+        duck = duckdb.connect()
+        try:
+            # Read in chunks to keep memory bounded
+            chunks = pd.read_sql_query("SELECT * FROM analytics", sqlite_conn, chunksize=500_000)
+            for i, chunk in enumerate(chunks):
+                if i == 0:
+                    duck.execute("CREATE TABLE analytics AS SELECT * FROM chunk")
+                else:
+                    duck.execute("INSERT INTO analytics SELECT * FROM chunk")
+            duck.execute(f"""
+                COPY (SELECT * FROM analytics ORDER BY year, month, "Исполнитель")
+                TO '{tmp_path}' (FORMAT PARQUET)
+            """)
+        finally:
+            duck.close()
+            sqlite_conn.close()
+        os.replace(tmp_path, parquet_path)
     
     def _execute_query(self, query: str, params: tuple = None) -> List[Dict]:
         """Execute SQL query and return results as list of dicts"""
-        cursor = self._conn.cursor()
+        cursor = self.conn.cursor()
         if params:
             cursor.execute(query, params)
         else:
@@ -98,12 +153,38 @@ class AnalyticsService:
     
     def _query_to_df(self, query: str, params: tuple = None) -> pd.DataFrame:
         """Execute SQL query and return pandas DataFrame"""
-        return pd.read_sql_query(query, self._conn, params=params)
+        if self._duck is not None:
+            return self._downcast(self.conn.execute(query, params or []).df())
+        return self._downcast(pd.read_sql_query(query, self.conn, params=params))
+    
+    @staticmethod
+    def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Shrink integer columns (streams, counts, year/month) to the smallest dtype that fits.
+        Revenue stays float64: float32 keeps only ~7 significant digits, not enough for money totals.
+        """
+        for column in df.select_dtypes(include='integer').columns:
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+        return df
+    
+    @staticmethod
+    def _rows(df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Rows as dicts of native Python values.
+        Converts column-wise (one tolist() per column) instead of building a Series per row like iterrows().
+        """
+        columns = df.columns.tolist()
+        return [dict(zip(columns, values)) for values in zip(*(df[c].tolist() for c in columns))]
     
     @property
     def conn(self):
-        """Get database connection"""
-        return self._conn
+        """Get database connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # DuckDB cursors are independent connections to the same database
+            conn = self._duck.cursor() if self._duck is not None else self._connect()
+            self._local.conn = conn
+        return conn
     
     # ============================================================================
     # OVERVIEW METRICS
@@ -177,7 +258,7 @@ class AnalyticsService:
                     "revenue_growth": float(row['revenue_growth']) if pd.notna(row['revenue_growth']) else None,
                     "streams_growth": float(row['streams_growth']) if pd.notna(row['streams_growth']) else None
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
@@ -202,7 +283,10 @@ class AnalyticsService:
         where_clause = f"WHERE year = {year}" if year else ""
         query = query.format(where_clause=where_clause)
         
-        df = self._query_to_df(query)
+        return self._format_monthly(self._query_to_df(query))
+    
+    def _format_monthly(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Build monthly trends payload from a (year, month, revenue, streams) frame"""
         df['cpm'] = (df['revenue'] / df['streams'] * 1000)
         
         return {
@@ -214,7 +298,7 @@ class AnalyticsService:
                     "streams": int(row['streams']),
                     "cpm": float(row['cpm']) if pd.notna(row['cpm']) else 0
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
@@ -231,8 +315,10 @@ class AnalyticsService:
             ORDER BY year, quarter
         """
         
-        df = self._query_to_df(query)
-        
+        return self._format_quarterly(self._query_to_df(query))
+    
+    def _format_quarterly(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Build quarterly trends payload from a (year, quarter, revenue, streams) frame"""
         return {
             "quarters": [
                 {
@@ -241,17 +327,59 @@ class AnalyticsService:
                     "revenue": float(row['revenue']),
                     "streams": int(row['streams'])
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
+    # ============================================================================
+    # BATCHED AGGREGATIONS
+    # ============================================================================
+    
+    TREND_METHODS = ('get_monthly_trends', 'get_quarterly_trends')
+    
+    def compute_bundle(self, specs: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Compute several aggregates in one call.
+        specs: list of (method name, params). Monthly and quarterly trends
+        requested together are derived from a single scan of the table.
+        """
+        rollup = None
+        if sum(name in self.TREND_METHODS for name, _ in specs) > 1:
+            rollup = self._query_to_df("""
+                SELECT 
+                    year,
+                    quarter,
+                    month,
+                    SUM("Сумма вознаграждения") as revenue,
+                    SUM("Количество") as streams
+                FROM analytics
+                GROUP BY year, quarter, month
+            """)
+        
+        results = []
+        for name, params in specs:
+            if rollup is not None and name == 'get_monthly_trends':
+                df = rollup
+                if params.get('year'):
+                    df = df[df['year'] == params['year']]
+                df = df.groupby(['year', 'month'], as_index=False)[['revenue', 'streams']].sum()
+                results.append(self._format_monthly(df))
+            elif rollup is not None and name == 'get_quarterly_trends':
+                df = rollup.groupby(['year', 'quarter'], as_index=False)[['revenue', 'streams']].sum()
+                results.append(self._format_quarterly(df))
+            else:
+                results.append(getattr(self, name)(**params))
+        
+        return results
+    
     # ============================================================================
     # TOP ARTISTS
     # ============================================================================
     
-    def get_top_artists(self, limit: int = 20, metric: str = 'revenue') -> Dict[str, Any]:
-        """Get top artists by revenue or streams"""
-        sort_column = '"Сумма вознаграждения"' if metric == 'revenue' else '"Количество"'
+    def get_top_artists(self, limit: int = 20, metric: str = 'revenue', offset: int = 0) -> Dict[str, Any]:
+        """Get top artists by revenue or streams (offset pages through the ranking)"""
+        # Aggregate alias: a bare column inside GROUP BY would sort by an arbitrary row's value
+        sort_column = 'revenue' if metric == 'revenue' else 'streams'
         
         query = f"""
             SELECT 
@@ -263,8 +391,8 @@ class AnalyticsService:
                 COUNT(DISTINCT "страна / регион") as countries
             FROM analytics
             GROUP BY "Исполнитель"
-            ORDER BY {sort_column} DESC
-            LIMIT {limit}
+            ORDER BY {sort_column} DESC, artist
+            LIMIT {limit} OFFSET {offset}
         """
         
         df = self._query_to_df(query)
@@ -287,7 +415,7 @@ class AnalyticsService:
                     "cpm": float(row['cpm']) if pd.notna(row['cpm']) else 0,
                     "revenue_per_track": float(row['revenue_per_track'])
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
@@ -295,9 +423,10 @@ class AnalyticsService:
     # TOP TRACKS
     # ============================================================================
     
-    def get_top_tracks(self, limit: int = 20, metric: str = 'revenue') -> Dict[str, Any]:
-        """Get top tracks by revenue or streams"""
-        sort_column = '"Сумма вознаграждения"' if metric == 'revenue' else '"Количество"'
+    def get_top_tracks(self, limit: int = 20, metric: str = 'revenue', offset: int = 0) -> Dict[str, Any]:
+        """Get top tracks by revenue or streams (offset pages through the ranking)"""
+        # Aggregate alias: a bare column inside GROUP BY would sort by an arbitrary row's value
+        sort_column = 'revenue' if metric == 'revenue' else 'streams'
         
         query = f"""
             SELECT 
@@ -307,8 +436,8 @@ class AnalyticsService:
                 SUM("Количество") as streams
             FROM analytics
             GROUP BY "Исполнитель", "Название трека"
-            ORDER BY {sort_column} DESC
-            LIMIT {limit}
+            ORDER BY {sort_column} DESC, artist, track
+            LIMIT {limit} OFFSET {offset}
         """
         
         df = self._query_to_df(query)
@@ -333,7 +462,7 @@ class AnalyticsService:
                     "streams_percentage": float(row['streams'] / totals['total_streams'] * 100) if totals['total_streams'] > 0 else 0,
                     "cpm": float(row['cpm']) if pd.notna(row['cpm']) else 0
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
@@ -368,7 +497,7 @@ class AnalyticsService:
                     "streams": int(row['streams']),
                     "cpm": float(row['cpm']) if pd.notna(row['cpm']) else 0
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
@@ -393,7 +522,7 @@ class AnalyticsService:
         if 2023 in pivot.columns and 2024 in pivot.columns:
             pivot['growth'] = ((pivot[2024] - pivot[2023]) / pivot[2023] * 100).replace([np.inf, -np.inf], 0)
             pivot['abs_growth'] = pivot[2024] - pivot[2023]
-            pivot = pivot.sort_values('abs_growth', ascending=False).head(15)
+            pivot = pivot.nlargest(15, 'abs_growth')
             
             return {
                 "platforms": [
@@ -404,7 +533,7 @@ class AnalyticsService:
                         "growth_percentage": float(row['growth']),
                         "absolute_growth": float(row['abs_growth'])
                     }
-                    for platform, row in pivot.iterrows()
+                    for platform, row in zip(pivot.index.tolist(), self._rows(pivot))
                 ]
             }
         
@@ -432,8 +561,9 @@ class AnalyticsService:
         df = self._query_to_df(query)
         df['cpm'] = (df['revenue'] / df['streams'] * 1000)
         
-        if sort_by == 'cpm':
-            df = df.sort_values('cpm', ascending=False).head(limit)
+        # Empty result has object-dtype columns, which nlargest rejects
+        if sort_by == 'cpm' and not df.empty:
+            df = df.nlargest(limit, 'cpm')
         
         totals = self._execute_query('''
             SELECT 
@@ -452,7 +582,7 @@ class AnalyticsService:
                     "streams_percentage": float(row['streams'] / totals['total_streams'] * 100) if totals['total_streams'] > 0 else 0,
                     "cpm": float(row['cpm']) if pd.notna(row['cpm']) else 0
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
@@ -472,8 +602,11 @@ class AnalyticsService:
         """
         
         df = self._query_to_df(query)
+        # No combination passes HAVING: object-dtype columns, nlargest would raise
+        if df.empty:
+            return {"combinations": []}
         df['cpm'] = (df['revenue'] / df['streams'] * 1000)
-        df = df.sort_values('cpm', ascending=False).head(limit)
+        df = df.nlargest(limit, 'cpm')
         
         return {
             "combinations": [
@@ -484,7 +617,7 @@ class AnalyticsService:
                     "revenue": float(row['revenue']),
                     "streams": int(row['streams'])
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
@@ -492,45 +625,36 @@ class AnalyticsService:
     # REVENUE CONCENTRATION
     # ============================================================================
     
+    @staticmethod
+    def _top_n_sums(values: pd.Series, ns: tuple) -> List[float]:
+        """Sums of the N largest values for each N in ns (one sort, one cumulative sum)"""
+        arr = np.nan_to_num(values.to_numpy(dtype=float))
+        if arr.size == 0:
+            return [0.0 for _ in ns]
+        cumulative = np.cumsum(-np.sort(-arr))
+        return [float(cumulative[min(n, arr.size) - 1]) for n in ns]
+    
     def get_revenue_concentration(self) -> Dict[str, Any]:
         """Get revenue concentration by artists and tracks"""
-        total_revenue = self._execute_query('SELECT SUM("Сумма вознаграждения") as total FROM analytics')[0]['total']
-        
-        # Artists concentration
-        artist_query = """
-            SELECT SUM("Сумма вознаграждения") as revenue
-            FROM (
-                SELECT "Исполнитель", SUM("Сумма вознаграждения") as "Сумма вознаграждения"
-                FROM analytics
-                GROUP BY "Исполнитель"
-                ORDER BY "Сумма вознаграждения" DESC
-                LIMIT ?
-            )
-        """
-        
-        top_10_artists = self._execute_query(artist_query, (10,))[0]['revenue']
-        top_20_artists = self._execute_query(artist_query, (20,))[0]['revenue']
-        top_50_artists = self._execute_query(artist_query, (50,))[0]['revenue']
-        
-        # Tracks concentration
-        track_query = """
-            SELECT SUM(revenue) as revenue
-            FROM (
-                SELECT "Исполнитель", "Название трека", SUM("Сумма вознаграждения") as revenue
-                FROM analytics
-                GROUP BY "Исполнитель", "Название трека"
-                ORDER BY revenue DESC
-                LIMIT ?
-            )
-        """
+        # One grouped scan per level; top-N shares come from a single sort + cumsum
+        artists = self._query_to_df("""
+            SELECT "Исполнитель" as artist, SUM("Сумма вознаграждения") as revenue
+            FROM analytics
+            GROUP BY "Исполнитель"
+        """)
+        tracks = self._query_to_df("""
+            SELECT "Исполнитель" as artist, "Название трека" as track, SUM("Сумма вознаграждения") as revenue
+            FROM analytics
+            GROUP BY "Исполнитель", "Название трека"
+        """)
         
-        top_10_tracks = self._execute_query(track_query, (10,))[0]['revenue']
-        top_50_tracks = self._execute_query(track_query, (50,))[0]['revenue']
-        top_100_tracks = self._execute_query(track_query, (100,))[0]['revenue']
+        total_revenue = float(np.nansum(artists['revenue'].to_numpy(dtype=float)))
+        top_10_artists, top_20_artists, top_50_artists = self._top_n_sums(artists['revenue'], (10, 20, 50))
+        top_10_tracks, top_50_tracks, top_100_tracks = self._top_n_sums(tracks['revenue'], (10, 50, 100))
         
-        # Total counts
-        total_artists = self._execute_query('SELECT COUNT(DISTINCT "Исполнитель") as count FROM analytics')[0]['count']
-        total_tracks = self._execute_query('SELECT COUNT(DISTINCT "Исполнитель" || "Название трека") as count FROM analytics')[0]['count']
+        # Total counts (NULL names are not counted, as with COUNT(DISTINCT ...))
+        total_artists = int(artists['artist'].notna().sum())
+        total_tracks = int((tracks['artist'].notna() & tracks['track'].notna()).sum())
         
         return {
             "artists": {
@@ -600,33 +724,27 @@ class AnalyticsService:
             growth_matrix['growth_percentage'] = ((growth_matrix['revenue_2024'] - growth_matrix['revenue_2023']) / growth_matrix['revenue_2023'] * 100).replace([np.inf, -np.inf], 0)
             growth_matrix['absolute_growth'] = growth_matrix['revenue_2024'] - growth_matrix['revenue_2023']
             
-            # Categorize artists
-            def categorize_artist(row):
-                rev_2023 = row['revenue_2023']
-                rev_2024 = row['revenue_2024']
-                growth = row['growth_percentage']
-                
-                if rev_2023 == 0 and rev_2024 > 1000:
-                    return 'new_star'
-                elif rev_2024 > 10000 and growth > 50:
-                    return 'rising_star'
-                elif rev_2024 > 10000 and growth > 0:
-                    return 'stable_star'
-                elif rev_2024 > 5000 and growth > 100:
-                    return 'breakthrough'
-                elif rev_2024 > 1000 and growth > 0:
-                    return 'growing'
-                elif rev_2024 > 1000 and growth < 0:
-                    return 'declining'
-                else:
-                    return 'emerging'
-            
-            growth_matrix['category'] = growth_matrix.apply(categorize_artist, axis=1)
+            # Categorize artists in one vectorized pass (first matching rule wins)
+            rev_2023 = growth_matrix['revenue_2023'].to_numpy()
+            rev_2024 = growth_matrix['revenue_2024'].to_numpy()
+            growth = growth_matrix['growth_percentage'].to_numpy()
+            growth_matrix['category'] = np.select(
+                [
+                    (rev_2023 == 0) & (rev_2024 > 1000),
+                    (rev_2024 > 10000) & (growth > 50),
+                    (rev_2024 > 10000) & (growth > 0),
+                    (rev_2024 > 5000) & (growth > 100),
+                    (rev_2024 > 1000) & (growth > 0),
+                    (rev_2024 > 1000) & (growth < 0),
+                ],
+                ['new_star', 'rising_star', 'stable_star', 'breakthrough', 'growing', 'declining'],
+                default='emerging'
+            )
             
             # Get top by category
             categories = {}
             for category in ['new_star', 'rising_star', 'stable_star', 'breakthrough']:
-                cat_data = growth_matrix[growth_matrix['category'] == category].sort_values('revenue_2024', ascending=False).head(limit)
+                cat_data = growth_matrix[growth_matrix['category'] == category].nlargest(limit, 'revenue_2024')
                 categories[category] = [
                     {
                         "artist": row['artist'],
@@ -637,7 +755,7 @@ class AnalyticsService:
                         "streams_2023": int(row['streams_2023']),
                         "streams_2024": int(row['streams_2024'])
                     }
-                    for _, row in cat_data.iterrows()
+                    for row in self._rows(cat_data)
                 ]
             
             # Category summary
@@ -654,7 +772,7 @@ class AnalyticsService:
                         "count": int(row['artist']),
                         "total_revenue_2024": float(row['revenue_2024'])
                     }
-                    for _, row in category_summary.iterrows()
+                    for row in self._rows(category_summary)
                 ]
             }
         
@@ -672,7 +790,7 @@ class AnalyticsService:
                 "Название трека" as track,
                 MIN("Месяц отчета") as first_month,
                 MAX("Месяц отчета") as last_month,
-                COUNT(DISTINCT strftime('%Y-%m', "Месяц отчета")) as active_months,
+                COUNT(DISTINCT year * 100 + month) as active_months,
                 SUM("Сумма вознаграждения") as revenue,
                 SUM("Количество") as streams
             FROM analytics
@@ -681,13 +799,16 @@ class AnalyticsService:
         """
         
         df = self._query_to_df(query)
+        # No track passes HAVING: object-dtype columns, nlargest would raise
+        if df.empty:
+            return {"long_running": [], "most_profitable_per_month": []}
         df['revenue_per_month'] = df['revenue'] / df['active_months']
         
         # Long-running tracks
-        long_tracks = df.sort_values('active_months', ascending=False).head(limit)
+        long_tracks = df.nlargest(limit, 'active_months')
         
         # Most profitable per month
-        profitable_tracks = df[df['active_months'] >= 3].sort_values('revenue_per_month', ascending=False).head(limit)
+        profitable_tracks = df[df['active_months'] >= 3].nlargest(limit, 'revenue_per_month')
         
         return {
             "long_running": [
@@ -699,7 +820,7 @@ class AnalyticsService:
                     "revenue_per_month": float(row['revenue_per_month']),
                     "streams": int(row['streams'])
                 }
-                for _, row in long_tracks.iterrows()
+                for row in self._rows(long_tracks)
             ],
             "most_profitable_per_month": [
                 {
@@ -710,7 +831,7 @@ class AnalyticsService:
                     "revenue_per_month": float(row['revenue_per_month']),
                     "streams": int(row['streams'])
                 }
-                for _, row in profitable_tracks.iterrows()
+                for row in self._rows(profitable_tracks)
             ]
         }
     
@@ -751,7 +872,7 @@ class AnalyticsService:
                     "cpm": float(row['cpm']) if pd.notna(row['cpm']) else 0,
                     "revenue_per_artist": float(row['revenue_per_artist'])
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
@@ -791,7 +912,7 @@ class AnalyticsService:
                     "streams_percentage": float(row['streams'] / totals['total_streams'] * 100) if totals['total_streams'] > 0 else 0,
                     "cpm": float(row['cpm']) if pd.notna(row['cpm']) else 0
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
@@ -827,10 +948,101 @@ class AnalyticsService:
                     "platforms": int(row['platforms']),
                     "countries": int(row['countries'])
                 }
-                for _, row in df.iterrows()
+                for row in self._rows(df)
             ]
         }
     
+    # ============================================================================
+    # WARMUP
+    # ============================================================================
+    
+    def warmup(self) -> None:
+        """
+        Run a small aggregation through the full query path (SQL -> DataFrame -> records)
+        so the first real request doesn't pay for cold page cache and lazy pandas/numpy setup.
+        """
+        self._rows(self._query_to_df("""
+            SELECT 
+                year,
+                month,
+                SUM("Сумма вознаграждения") as revenue,
+                SUM("Количество") as streams
+            FROM analytics
+            GROUP BY year, month
+        """))
+        self.get_overview_stats()
+    
+    # ============================================================================
+    # PRECOMPUTED ROLLUPS
+    # ============================================================================
+    
+    # Slowly-changing aggregates served from precomputed rollups: (method, params)
+    ROLLUP_SPECS = [
+        ('get_overview_stats', {}),
+        ('get_yearly_trends', {}),
+        ('get_monthly_trends', {'year': None}),
+        ('get_quarterly_trends', {}),
+        ('get_top_artists', {'limit': 20, 'metric': 'revenue', 'offset': 0}),
+        ('get_top_artists', {'limit': 20, 'metric': 'streams', 'offset': 0}),
+        ('get_platform_growth', {}),
+        ('get_revenue_concentration', {}),
+        ('get_label_stats', {'limit': 10}),
+    ]
+    
+    @staticmethod
+    def _rollup_key(name: str, params: Dict[str, Any]) -> str:
+        """Rollup file stem, e.g. get_top_artists__limit=20_metric=revenue_offset=0"""
+        suffix = '_'.join(f"{k}={v}" for k, v in sorted(params.items()))
+        return f"{name}__{suffix}" if suffix else name
+    
+    @property
+    def rollup_dir(self) -> str:
+        return os.path.join(os.path.dirname(self.db_path), 'rollups')
+    
+    def refresh_rollups(self) -> int:
+        """
+        Recompute all rollups and persist them as JSON files in rollup_dir.
+        Returns the number of rollups written.
+        """
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        results = self.compute_bundle(self.ROLLUP_SPECS)
+        
+        rollups = {}
+        for (name, params), result in zip(self.ROLLUP_SPECS, results):
+            key = self._rollup_key(name, params)
+            path = os.path.join(self.rollup_dir, f"{key}.json")
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY))
+            os.replace(tmp_path, path)
+            rollups[key] = result
+        
+        self._rollups = rollups
+        print(f"✅ Refreshed {len(rollups)} analytics rollups in {self.rollup_dir}")
+        return len(rollups)
+    
+    def load_rollups(self) -> bool:
+        """
+        Load persisted rollups if they are newer than the database.
+        Returns False if any rollup is missing or stale.
+        """
+        rollups = {}
+        db_mtime = os.path.getmtime(self.db_path)
+        for name, params in self.ROLLUP_SPECS:
+            key = self._rollup_key(name, params)
+            path = os.path.join(self.rollup_dir, f"{key}.json")
+            if not os.path.exists(path) or os.path.getmtime(path) < db_mtime:
+                return False
+            with open(path, 'rb') as f:
+                rollups[key] = orjson.loads(f.read())
+        
+        self._rollups = rollups
+        return True
+    
+    def get_rollup(self, name: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Precomputed result for (method, params), or None if it is not rolled up"""
+        return self._rollups.get(self._rollup_key(name, params))
+    
     # ============================================================================
     # COMPATIBILITY: df property for backward compatibility
     # ============================================================================
@@ -842,5 +1054,5 @@ class AnalyticsService:
         WARNING: This loads all data into memory! Use only when necessary.
         """
         print("⚠️  Warning: Loading full dataset into memory (compatibility mode)")
-        return pd.read_sql_query("SELECT * FROM analytics", self._conn)
+        return self._query_to_df("SELECT * FROM analytics")
 
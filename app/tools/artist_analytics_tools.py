@@ -5,6 +5,7 @@ SQLite версия для оптимизации памяти
 """
 
 import pandas as pd
+import numpy as np
 import sqlite3
 import os
 from pathlib import Path
@@ -33,6 +34,34 @@ class ArtistAnalyticsTools:
         self.conn = sqlite3.connect(self.db_path)
         print(f"✅ ArtistAnalyticsTools initialized with SQLite from {self.db_path}")
     
+    @staticmethod
+    def _top_records(df: pd.DataFrame, name_field: str) -> List[Dict[str, Any]]:
+        """
+        Строки топа (name_field, streams, revenue) в список словарей с долей дохода.
+        Колонки берутся массивами целиком, без iterrows
+        """
+        revenue = df['revenue'].to_numpy(dtype=np.float64)
+        total_revenue = revenue.sum()
+        if total_revenue > 0:
+            percentage = np.round(revenue / total_revenue * 100, 2)
+        else:
+            percentage = np.zeros(len(revenue))
+        
+        return [
+            {
+                name_field: name,
+                "streams": streams,
+                "revenue": rev,
+                "percentage": pct
+            }
+            for name, streams, rev, pct in zip(
+                df[name_field].tolist(),
+                df['streams'].to_numpy(dtype=np.int64).tolist(),
+                revenue.tolist(),
+                percentage.tolist()
+            )
+        ]
+    
     def _load_data(self, period: str = "all", artist_name: str = None) -> pd.DataFrame:
         """
         Загрузка данных за период из SQLite
@@ -185,16 +214,7 @@ class ArtistAnalyticsTools:
             if df.empty:
                 return {"error": f"Артист '{artist_name}' не найден"}
             
-            total_revenue = df['revenue'].sum()
-            
-            platforms = []
-            for _, row in df.iterrows():
-                platforms.append({
-                    "platform": row['platform'],
-                    "streams": int(row['streams']),
-                    "revenue": float(row['revenue']),
-                    "percentage": round((row['revenue'] / total_revenue * 100), 2) if total_revenue > 0 else 0
-                })
+            platforms = self._top_records(df, 'platform')
             
             # Получаем общее количество платформ
             total_platforms_query = """
@@ -254,16 +274,7 @@ class ArtistAnalyticsTools:
             if df.empty:
                 return {"error": f"Артист '{artist_name}' не найден"}
             
-            total_revenue = df['revenue'].sum()
-            
-            countries = []
-            for _, row in df.iterrows():
-                countries.append({
-                    "country": row['country'],
-                    "streams": int(row['streams']),
-                    "revenue": float(row['revenue']),
-                    "percentage": round((row['revenue'] / total_revenue * 100), 2) if total_revenue > 0 else 0
-                })
+            countries = self._top_records(df, 'country')
             
             # Получаем общее количество стран
             total_countries_query = """
@@ -323,16 +334,7 @@ class ArtistAnalyticsTools:
             if df.empty:
                 return {"error": f"Артист '{artist_name}' не найден"}
             
-            total_revenue = df['revenue'].sum()
-            
-            tracks = []
-            for _, row in df.iterrows():
-                tracks.append({
-                    "track_name": row['track_name'],
-                    "streams": int(row['streams']),
-                    "revenue": float(row['revenue']),
-                    "percentage": round((row['revenue'] / total_revenue * 100), 2) if total_revenue > 0 else 0
-                })
+            tracks = self._top_records(df, 'track_name')
             
             # Получаем общее количество треков
             total_tracks_query = """
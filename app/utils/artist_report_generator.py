@@ -21,7 +21,7 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import matplotlib
 matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import io
 import logging
 
@@ -47,8 +47,8 @@ except:
         logger.warning("⚠ Используются шрифты без кириллицы")
 
 # Matplotlib для кириллицы
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Arial Unicode MS', 'Arial']
+matplotlib.rcParams['font.family'] = 'DejaVu Sans'
+matplotlib.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Arial Unicode MS', 'Arial']
 
 
 class ArtistReportGenerator:
@@ -142,7 +142,7 @@ class ArtistReportGenerator:
         platforms.columns = ['platform', 'streams', 'revenue']
         platforms['percentage'] = (platforms['revenue'] / total_revenue * 100).round(2)
         platforms['avg_price_per_stream'] = (platforms['revenue'] / platforms['streams']).round(6)
-        top_platforms = platforms.sort_values('revenue', ascending=False).head(5).to_dict('records')
+        top_platforms = platforms.nlargest(5, 'revenue').to_dict('records')
         
         # Топ-10 стран
         if 'страна / регион' in artist_df.columns:
@@ -152,7 +152,7 @@ class ArtistReportGenerator:
             }).reset_index()
             countries.columns = ['country', 'streams', 'revenue']
             countries['percentage'] = (countries['streams'] / total_streams * 100).round(2)
-            top_countries = countries.sort_values('revenue', ascending=False).head(10).to_dict('records')
+            top_countries = countries.nlargest(10, 'revenue').to_dict('records')
         else:
             top_countries = []
         
@@ -162,7 +162,7 @@ class ArtistReportGenerator:
             'Сумма вознаграждения': 'sum'
         }).reset_index()
         tracks.columns = ['track_name', 'streams', 'revenue']
-        top_tracks = tracks.sort_values('streams', ascending=False).head(10).to_dict('records')
+        top_tracks = tracks.nlargest(10, 'streams').to_dict('records')
         
         # Динамика по месяцам
         if 'Месяц отчета' in artist_df.columns:
@@ -686,17 +686,18 @@ class ArtistReportGenerator:
         labels = [p['platform'][:15] for p in platforms]
         revenues = [p['revenue'] for p in platforms]
         
-        plt.figure(figsize=(7, 5))
+        # Отдельный Figure без глобального состояния pyplot: отчеты строятся в параллельных потоках
+        fig = Figure(figsize=(7, 5))
+        ax = fig.subplots()
         colors_list = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
-        plt.pie(revenues, labels=labels, autopct='%1.1f%%', 
-                colors=colors_list, startangle=90)
-        plt.title('Топ-5 платформ по доходу', fontsize=12, fontweight='bold')
-        plt.tight_layout()
+        ax.pie(revenues, labels=labels, autopct='%1.1f%%', 
+               colors=colors_list, startangle=90)
+        ax.set_title('Топ-5 платформ по доходу', fontsize=12, fontweight='bold')
+        fig.tight_layout()
         
         buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150)
+        fig.savefig(buf, format='png', dpi=150)
         buf.seek(0)
-        plt.close()
         
         return buf
     
@@ -710,18 +711,18 @@ class ArtistReportGenerator:
         country_names = [c['country'][:15] for c in countries]
         revenues = [c['revenue'] for c in countries]
         
-        plt.figure(figsize=(8, 5))
-        plt.barh(country_names, revenues, color='#5C6BC0', alpha=0.8)
-        plt.xlabel('Доход (EUR)', fontsize=10)
-        plt.title('Топ-8 стран по доходу', fontsize=12, fontweight='bold')
-        plt.gca().invert_yaxis()
-        plt.grid(axis='x', alpha=0.3)
-        plt.tight_layout()
+        fig = Figure(figsize=(8, 5))
+        ax = fig.subplots()
+        ax.barh(country_names, revenues, color='#5C6BC0', alpha=0.8)
+        ax.set_xlabel('Доход (EUR)', fontsize=10)
+        ax.set_title('Топ-8 стран по доходу', fontsize=12, fontweight='bold')
+        ax.invert_yaxis()
+        ax.grid(axis='x', alpha=0.3)
+        fig.tight_layout()
         
         buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=150)
+        fig.savefig(buf, format='png', dpi=150)
         buf.seek(0)
-        plt.close()
         
         return buf
     
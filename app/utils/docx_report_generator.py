@@ -207,7 +207,7 @@ class DocxReportGenerator:
             run.font.size = Pt(14)
             run.bold = True
             
-            top_5_tracks = top_tracks.sort_values('Количество', ascending=False).head(5)
+            top_5_tracks = top_tracks.nlargest(5, 'Количество')
             table1 = doc.add_table(rows=len(top_5_tracks) + 1, cols=3)
             self._set_table_borders(table1)
             
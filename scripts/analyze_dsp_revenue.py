@@ -711,11 +711,9 @@ class DSPRevenueAnalyzer:
             if col not in ['revenue_clean', 'total_revenue_clean', 'quantity_clean']
         ]
         
-        self.results['combined_df'][columns_to_save].to_csv(
-            full_data_report, 
-            encoding='utf-8-sig',
-            index=False
-        )
+        # Полный датасет: пишем через буфер 1 MiB, чтобы не дробить запись на мелкие write()
+        with open(full_data_report, 'w', encoding='utf-8-sig', newline='', buffering=1024 * 1024) as f:
+            self.results['combined_df'][columns_to_save].to_csv(f, index=False)
         print(f"   ✓ {full_data_report.name}")
         
         print(f"\n✅ Все отчеты сохранены в {output_dir}/")
@@ -344,7 +344,8 @@ class TrackRevenueAnalyzer:
         
         # 4. Сохраняем все записи трека
         all_records_file = output_path / f'track_{safe_track_name}_all_records.csv'
-        self.results['combined_df'].to_csv(all_records_file, encoding='utf-8-sig', index=False)
+        with open(all_records_file, 'w', encoding='utf-8-sig', newline='', buffering=1024 * 1024) as f:
+            self.results['combined_df'].to_csv(f, index=False)
         print(f"   ✓ {all_records_file.name}")
         
         # 5. Создаем JSON с результатами